@@ -2,19 +2,120 @@ import io
 import os
 import json
 from dotenv import load_dotenv
-import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 from PIL import Image
 import logging
+import threading
+from datetime import datetime
+from utils.clients import CLIENT_HEALTH_TIMEOUT, get_client_manager, grpc_keepalive_options
+from utils.extraction_cache import get_extraction_cache, page_digest
+from utils.preprocess import encode_for_model
+from utils.metrics import get_metrics
+from utils.resilience import CircuitBreaker, CircuitOpenError, DeadlineExceededError, ResilientCaller, TokenBucket
 
 load_dotenv()
 
-# configure Gemini API
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("GEMINI_API_KEY is missing in environment variables.")
+MODEL_NAME = "gemini-2.0-flash"
 
-genai.configure(api_key=api_key)
-model = genai.GenerativeModel("gemini-2.0-flash")
+# Gemini model, configured on first use (tests and benchmarks may assign a stand-in)
+model = None
+_model_lock = threading.Lock()
+
+def _build_model():
+    # deferred: the SDK takes about a second to import
+    import google.generativeai as genai
+    from google.ai.generativelanguage_v1beta.services.generative_service import GenerativeServiceClient
+    from google.ai.generativelanguage_v1beta.services.generative_service.transports import GenerativeServiceGrpcTransport
+
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY is missing in environment variables.")
+    genai.configure(api_key=api_key)
+
+    def keepalive_channel(host, **kwargs):
+        kwargs["options"] = kwargs.get("options", []) + grpc_keepalive_options()
+        return GenerativeServiceGrpcTransport.create_channel(host, **kwargs)
+
+    new_model = genai.GenerativeModel(MODEL_NAME)
+    # the SDK creates the client lazily on each model's first call, racing across worker threads;
+    # build it here instead, on one gRPC channel that every call multiplexes over
+    new_model._client = GenerativeServiceClient(
+        client_options={"api_key": api_key},
+        transport=lambda **kwargs: GenerativeServiceGrpcTransport(channel=keepalive_channel, **kwargs),
+    )
+    return new_model
+
+def _model_channel(client):
+    return client._client.transport.grpc_channel
+
+def _ping_model(client):
+    # waits for the channel to be connected; costs no quota
+    import grpc
+
+    grpc.channel_ready_future(_model_channel(client)).result(timeout=CLIENT_HEALTH_TIMEOUT)
+
+def _use_model(old, new):
+    global model
+    # a stand-in assigned by tests or benchmarks is left alone
+    if model is old:
+        model = new
+
+_model_client = get_client_manager().register(
+    "gemini", _build_model, _ping_model,
+    close=lambda client: _model_channel(client).close(),
+)
+_model_client.on_reconnect(_use_model)
+
+def get_model():
+    """Configure the Gemini API and build the model once per process."""
+    global model
+    if model is not None:
+        _model_client.check_if_due()
+        return model
+    with _model_lock:
+        if model is None:
+            model = _model_client.get()
+        return model
+
+# resilience policy shared by every session in the process
+GEMINI_RATE_PER_MINUTE = float(os.getenv("GEMINI_RATE_PER_MINUTE", "60"))
+GEMINI_RATE_BURST = int(os.getenv("GEMINI_RATE_BURST", "10"))
+GEMINI_MAX_ATTEMPTS = int(os.getenv("GEMINI_MAX_ATTEMPTS", "4"))
+GEMINI_CALL_DEADLINE = float(os.getenv("GEMINI_CALL_DEADLINE", "90"))
+GEMINI_BREAKER_THRESHOLD = int(os.getenv("GEMINI_BREAKER_THRESHOLD", "5"))
+GEMINI_BREAKER_RESET = float(os.getenv("GEMINI_BREAKER_RESET", "30"))
+
+# transient failures: quota (429), server errors (5xx), timeouts and dropped connections
+RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests,
+    google_exceptions.InternalServerError, google_exceptions.BadGateway,
+    google_exceptions.ServiceUnavailable, google_exceptions.GatewayTimeout,
+    google_exceptions.DeadlineExceeded, ConnectionError, TimeoutError,
+)
+
+# calls refused before reaching Gemini (open breaker, rate-limit wait past the deadline): the page was never
+# tried, so these propagate to the caller instead of being reported as a failed extraction
+REJECTED_ERRORS = (CircuitOpenError, DeadlineExceededError)
+
+gemini_caller = ResilientCaller(
+    limiter=TokenBucket(GEMINI_RATE_PER_MINUTE / 60, GEMINI_RATE_BURST),
+    breaker=CircuitBreaker(GEMINI_BREAKER_THRESHOLD, GEMINI_BREAKER_RESET),
+    retryable=RETRYABLE_ERRORS,
+    max_attempts=GEMINI_MAX_ATTEMPTS,
+    deadline=GEMINI_CALL_DEADLINE,
+)
+
+def _generate_once(contents, timeout):
+    return get_model().generate_content(contents, request_options={"timeout": timeout})
+
+def generate_content(contents):
+    """Call Gemini through the process-wide rate limiter, retry policy and circuit breaker."""
+    get_metrics().incr("gemini_images", len(contents) - 1)
+    with get_metrics().stage("gemini", images=len(contents) - 1):
+        return gemini_caller.call(_generate_once, contents)
+
+# cache extraction results by page digest unless disabled
+EXTRACTION_CACHE_ENABLED = os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
 
 
 PROMPT = PROMPT = """Extract details from the scanned cheque and return the response in JSON format:
@@ -29,44 +130,192 @@ PROMPT = PROMPT = """Extract details from the scanned cheque and return the resp
         Ensure correct JSON formatting, return empty strings for missing fields, and strictly use 'YYYY-MM-DD' for cheque_date.        
     """
 
-def extract_cheque_details(image_bytes):
-    """Extract cheque details using Gemini API and return a structured JSON response."""
-    try:
-        # open image from bytes
-        opened_image = Image.open(io.BytesIO(image_bytes))
+REQUIRED_KEYS = ["payee_name", "cheque_date", "cheque_number", "account_number", "bank_name", "amount"]
 
-        # generate response from Gemini API
-        response = model.generate_content([PROMPT, opened_image])
+def _open_page(page):
+    """Return (decoded image, payload blob or None) for a decoded page or raw image bytes."""
+    if isinstance(page, Image.Image):
+        # decoded page: encode once, as the payload
+        return page, None
+    # raw bytes: send them as they are instead of re-encoding
+    opened_image = Image.open(io.BytesIO(page))
+    return opened_image, {"mime_type": Image.MIME.get(opened_image.format, "image/jpeg"), "data": page}
+
+def _payload(opened_image, blob):
+    """Return the request payload for a page, JPEG-encoding decoded images."""
+    if blob is None:
+        with get_metrics().stage("encode"):
+            blob = encode_for_model(opened_image)
+    get_metrics().incr("payload_bytes", len(blob["data"]))
+    return blob
 
-        # ensure response text exists
-        if not hasattr(response, "text") or not response.text.strip():
-            raise ValueError("API returned no valid response.")
+def _parse_response(response):
+    """Parse the JSON text of a Gemini response."""
+    # ensure response text exists
+    if not hasattr(response, "text") or not response.text.strip():
+        raise ValueError("API returned no valid response.")
 
-        response_text = response.text.strip().replace("```json", "").replace("```", "")
+    response_text = response.text.strip().replace("```json", "").replace("```", "")
 
-        # validate JSON response
+    # validate JSON response
+    with get_metrics().stage("parse", chars=len(response_text)):
         try:
-            response_dict = json.loads(response_text)
+            return json.loads(response_text)
         except json.JSONDecodeError as e:
             logging.error(f"Failed to parse JSON response: {response_text}")
             raise ValueError(f"Failed to parse JSON response: {e}")
 
-        # ensure required fields exist
-        required_keys = ["payee_name", "cheque_date", "cheque_number", "account_number", "bank_name", "amount"]
-        for key in required_keys:
-            response_dict.setdefault(key, "")
+def _normalize_details(response_dict):
+    """Fill in missing fields and validate the cheque date."""
+    # ensure required fields exist
+    for key in REQUIRED_KEYS:
+        response_dict.setdefault(key, "")
+
+    # validate date format
+    if response_dict["cheque_date"]:
+        try:
+            response_dict["cheque_date"] = datetime.strptime(response_dict["cheque_date"], "%Y-%m-%d").strftime("%Y-%m-%d")
+        except ValueError:
+            logging.warning(f"Invalid cheque_date format: {response_dict['cheque_date']}")
+            response_dict["cheque_date"] = ""
+    return response_dict
+
+def extract_cheque_details(page):
+    """Extract cheque details using Gemini API and return a structured JSON response.
+
+    page is either a decoded PIL image (see utils.preprocess) or raw image bytes.
+    Returns None when extraction failed; raises REJECTED_ERRORS when Gemini was not called.
+    """
+    try:
+        opened_image, blob = _open_page(page)
+
+        # skip the API call for pages we have already read
+        cache_key = None
+        if EXTRACTION_CACHE_ENABLED:
+            cache_key = page_digest(opened_image, PROMPT, MODEL_NAME)
+            cached = get_extraction_cache().get(cache_key)
+            if cached is not None:
+                logging.info("Extraction cache hit; skipping Gemini call.")
+                return cached
+
+        # generate response from Gemini API
+        response = generate_content([PROMPT, _payload(opened_image, blob)])
+        _record_usage(response, 1)
+
+        response_dict = _parse_response(response)
+        if not isinstance(response_dict, dict):
+            raise ValueError("API response is not a JSON object.")
+        response_dict = _normalize_details(response_dict)
 
-        # validate date format
-        if response_dict["cheque_date"]:
-            try:
-                from datetime import datetime
-                response_dict["cheque_date"] = datetime.strptime(response_dict["cheque_date"], "%Y-%m-%d").strftime("%Y-%m-%d")
-            except ValueError:
-                logging.warning(f"Invalid cheque_date format: {response_dict['cheque_date']}")
-                response_dict["cheque_date"] = ""
+        if cache_key is not None:
+            get_extraction_cache().put(cache_key, response_dict)
 
         return response_dict
 
+    except REJECTED_ERRORS:
+        raise
     except Exception as e:
         logging.error(f"Error processing image: {e}")
-        return None  
\ No newline at end of file
+        return None  
+
+# batched extraction: several cheques per request
+GEMINI_BATCH_SIZE = int(os.getenv("GEMINI_BATCH_SIZE", "1"))
+
+BATCH_PROMPT = """You are given {count} scanned cheque images, in order. Extract details from each cheque and return
+    a JSON array with exactly {count} objects, one per image and in the same order as the images:
+    [
+        {{
+            "payee_name": "Full name of the payee",
+            "cheque_date": "yyyy-mm-dd (e.g., '2025-02-20')",
+            "cheque_number": "Cheque number as it appears",
+            "account_number": "Numeric only, ignore any characters",
+            "bank_name": "Full name of the bank",
+            "amount": "Numeric form only (e.g., '20000')"
+        }}
+    ]
+        Ensure correct JSON formatting, return empty strings for missing fields, and strictly use 'YYYY-MM-DD' for cheque_date.
+        If an image is not a readable cheque, still return an object for it with empty strings.
+    """
+
+# request and token counters for comparing single and batched extraction
+usage_stats = {"requests": 0, "cheques": 0, "prompt_tokens": 0, "output_tokens": 0, "batch_splits": 0}
+_usage_lock = threading.Lock()
+
+def _record_usage(response, cheques):
+    usage = getattr(response, "usage_metadata", None)
+    with _usage_lock:
+        usage_stats["requests"] += 1
+        usage_stats["cheques"] += cheques
+        usage_stats["prompt_tokens"] += getattr(usage, "prompt_token_count", 0) or 0
+        usage_stats["output_tokens"] += getattr(usage, "candidates_token_count", 0) or 0
+
+def _extract_batch(opened_pages):
+    """Send one multi-image request; split it in half and retry if the array comes back malformed or the wrong length."""
+    if len(opened_pages) == 1:
+        opened_image, blob = opened_pages[0]
+        return [extract_cheque_details(blob["data"] if blob else opened_image)]
+
+    contents = [BATCH_PROMPT.format(count=len(opened_pages))]
+    contents.extend(_payload(opened_image, blob) for opened_image, blob in opened_pages)
+    try:
+        response = generate_content(contents)
+    except REJECTED_ERRORS:
+        raise
+    except Exception as e:
+        # the request itself failed (after its retries): smaller requests would only fail again
+        logging.error(f"Batch of {len(opened_pages)} cheques failed: {e}")
+        return [None] * len(opened_pages)
+    _record_usage(response, len(opened_pages))
+
+    try:
+        results = _parse_response(response)
+        if not isinstance(results, list) or len(results) != len(opened_pages) or not all(isinstance(item, dict) for item in results):
+            raise ValueError(f"expected a JSON array of {len(opened_pages)} objects")
+    except ValueError as e:
+        middle = len(opened_pages) // 2
+        logging.warning(f"Batch of {len(opened_pages)} cheques failed ({e}); retrying as {middle} + {len(opened_pages) - middle}.")
+        with _usage_lock:
+            usage_stats["batch_splits"] += 1
+        return _extract_batch(opened_pages[:middle]) + _extract_batch(opened_pages[middle:])
+    return [_normalize_details(item) for item in results]
+
+def extract_cheque_details_batch(pages, batch_size=None):
+    """Extract several cheques with one request per batch_size pages.
+
+    Returns details in the same order as pages (None where extraction failed).
+    Cached pages are answered without a request; a batch whose reply is not
+    an array of the right length is split and retried, down to single pages.
+    Raises REJECTED_ERRORS when Gemini refuses calls; pages extracted before
+    that are in the extraction cache.
+    """
+    batch_size = max(1, batch_size or GEMINI_BATCH_SIZE)
+    if batch_size == 1:
+        return [extract_cheque_details(page) for page in pages]
+
+    results = [None] * len(pages)
+    pending = []  # (page index, opened image, blob, cache key)
+    for idx, page in enumerate(pages):
+        try:
+            opened_image, blob = _open_page(page)
+        except Exception as e:
+            logging.error(f"Error processing image: {e}")
+            continue
+        cache_key = None
+        if EXTRACTION_CACHE_ENABLED:
+            cache_key = page_digest(opened_image, PROMPT, MODEL_NAME)
+            results[idx] = get_extraction_cache().get(cache_key)
+            if results[idx] is not None:
+                continue
+        pending.append((idx, opened_image, blob, cache_key))
+
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        details_list = _extract_batch([(opened_image, blob) for _, opened_image, blob, _ in batch])
+        for (idx, _, _, cache_key), details in zip(batch, details_list):
+            results[idx] = details
+            if details is not None and cache_key is not None:
+                get_extraction_cache().put(cache_key, details)
+    return results
+
+# background job workers sending queued pages to Gemini concurrently
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", "4"))
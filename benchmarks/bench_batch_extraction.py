@@ -0,0 +1,108 @@
+"""Throughput and token cost per cheque: batched multi-image requests against single-image mode.
+
+Run from the repository root:
+
+    python benchmarks/bench_batch_extraction.py --cheques 64 --batch-sizes 1 4 8 16
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-stub")
+os.environ.setdefault("GEMINI_RATE_PER_MINUTE", "1000000")
+os.environ.setdefault("GEMINI_RATE_BURST", "1000")
+os.environ.setdefault("METRICS_JSON_LOGS", "false")
+os.environ["EXTRACTION_CACHE_ENABLED"] = "false"
+
+from PIL import Image
+
+import apiconfig
+
+DETAILS = {
+    "payee_name": "Benchmark Payee",
+    "cheque_date": "2025-02-20",
+    "cheque_number": "000123",
+    "account_number": "1234567890",
+    "bank_name": "Benchmark Bank",
+    "amount": "20000",
+}
+
+
+class StubBatchModel:
+    """Stands in for GenerativeModel with a fixed per-request overhead and per-image cost.
+
+    Token counts follow Gemini's accounting of a fixed cost per image; a
+    fraction of multi-image replies come back with the wrong number of items.
+    """
+
+    def __init__(self, overhead, per_image, prompt_tokens, image_tokens, output_tokens, malformed_rate, seed=0):
+        self.overhead = overhead
+        self.per_image = per_image
+        self.prompt_tokens = prompt_tokens
+        self.image_tokens = image_tokens
+        self.output_tokens = output_tokens
+        self.malformed_rate = malformed_rate
+        self.random = random.Random(seed)
+
+    def generate_content(self, contents, **kwargs):
+        images = len(contents) - 1
+        time.sleep(self.overhead + self.per_image * images)
+        usage = SimpleNamespace(
+            prompt_token_count=self.prompt_tokens + self.image_tokens * images,
+            candidates_token_count=self.output_tokens * images,
+        )
+        if images == 1 and contents[0] == apiconfig.PROMPT:
+            text = json.dumps(DETAILS)
+        else:
+            count = images - 1 if self.random.random() < self.malformed_rate else images
+            text = json.dumps([DETAILS] * count)
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+
+def make_page(i):
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 32), (i % 256, 255, 255)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cheques", type=int, default=64)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--overhead", type=float, default=0.4, help="fixed seconds per request")
+    parser.add_argument("--per-image", type=float, default=0.05, help="extra seconds per image in a request")
+    parser.add_argument("--malformed-rate", type=float, default=0.05)
+    parser.add_argument("--input-price", type=float, default=0.10, help="USD per 1M input tokens")
+    parser.add_argument("--output-price", type=float, default=0.40, help="USD per 1M output tokens")
+    args = parser.parse_args()
+
+    pages = [make_page(i) for i in range(args.cheques)]
+
+    print(f"{args.cheques} cheques, {args.overhead:.2f}s/request + {args.per_image:.2f}s/image, "
+          f"{args.malformed_rate:.0%} malformed batch replies")
+    print(f"{'batch':>6} {'seconds':>8} {'cheques/s':>10} {'requests':>9} {'splits':>7} {'tokens/chq':>11} {'USD/1k chq':>11}")
+    for batch_size in args.batch_sizes:
+        apiconfig.model = StubBatchModel(args.overhead, args.per_image, 300, 258, 60, args.malformed_rate)
+        for key in apiconfig.usage_stats:
+            apiconfig.usage_stats[key] = 0
+
+        start = time.perf_counter()
+        results = apiconfig.extract_cheque_details_batch(pages, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        assert len(results) == args.cheques and all(results)
+
+        stats = apiconfig.usage_stats
+        tokens = stats["prompt_tokens"] + stats["output_tokens"]
+        cost = (stats["prompt_tokens"] * args.input_price + stats["output_tokens"] * args.output_price) / 1e6
+        print(f"{batch_size:>6} {elapsed:>8.2f} {args.cheques / elapsed:>10.1f} {stats['requests']:>9} "
+              f"{stats['batch_splits']:>7} {tokens / args.cheques:>11.0f} {cost / args.cheques * 1000:>11.4f}")
+
+
+if __name__ == "__main__":
+    main()
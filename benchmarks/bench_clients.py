@@ -0,0 +1,99 @@
+"""Concurrent requests through the shared keep-alive pool against a new connection per request.
+
+Serves a small JSON response from a local HTTP server with a fixed
+latency, and has --threads threads each send --requests requests, as
+concurrent Streamlit sessions do. Plain HTTP on localhost only shows the
+TCP setup; against Supabase each new connection also pays a TLS handshake.
+Run from the repository root:
+
+    python benchmarks/bench_clients.py --threads 16 --requests 50
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("METRICS_JSON_LOGS", "false")
+
+import httpx
+
+from utils.clients import http_pool_stats, pooled_http_client
+from utils.metrics import get_metrics
+
+BODY = b'[{"id": 1, "bank_name": "Benchmark Bank"}]'
+
+
+def serve(latency):
+    """Start a keep-alive HTTP server on a free port; returns it and the set of client addresses it saw."""
+    peers = set()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            peers.add(self.client_address)
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(BODY)))
+            self.end_headers()
+            self.wfile.write(BODY)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, peers
+
+
+def run(threads, requests, send):
+    def worker():
+        for _ in range(requests):
+            send().raise_for_status()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=50, help="requests per thread")
+    parser.add_argument("--latency", type=float, default=0.005, help="server latency per request, in seconds")
+    args = parser.parse_args()
+
+    total = args.threads * args.requests
+    print(f"{'client':>14} {'seconds':>9} {'req/s':>9} {'connections':>12}")
+
+    server, peers = serve(args.latency)
+    url = f"http://127.0.0.1:{server.server_address[1]}/rest/v1/cheque_details_tbl"
+
+    def fresh_connection():
+        with httpx.Client() as client:
+            return client.get(url)
+
+    elapsed = run(args.threads, args.requests, fresh_connection)
+    print(f"{'per request':>14} {elapsed:>9.3f} {total / elapsed:>9.0f} {len(peers):>12}")
+
+    peers.clear()
+    client = pooled_http_client()
+    elapsed = run(args.threads, args.requests, lambda: client.get(url))
+    opened = get_metrics().counters().get("http_connections_opened", 0)
+    print(f"{'pooled':>14} {elapsed:>9.3f} {total / elapsed:>9.0f} {len(peers):>12}")
+    print(f"\npool after the run: {http_pool_stats(client)}, connections opened: {opened}")
+    client.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
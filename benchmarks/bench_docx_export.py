@@ -0,0 +1,49 @@
+"""DOCX export throughput: the bulk table writer against the original converter.
+
+Run from the repository root:
+
+    python benchmarks/bench_docx_export.py --rows 1000 5000 20000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from datasets import make_cheque_records, readable
+from legacy_exports import convert_df_to_docx as legacy_convert_df_to_docx
+from utils.docx_table import render_docx_table
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--legacy-max-rows", type=int, default=20000)
+    parser.add_argument("--max-rows-per-table", type=int, default=None)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'bulk s':>8} {'rows/s':>9} {'MB':>6} {'legacy s':>9} {'speedup':>8}")
+    for rows in args.rows:
+        frame = readable(make_cheque_records(rows))
+        elapsed, output = timed(render_docx_table, frame, max_rows_per_table=args.max_rows_per_table)
+
+        legacy = "-"
+        speedup = "-"
+        if rows <= args.legacy_max_rows:
+            legacy_elapsed, _ = timed(legacy_convert_df_to_docx, frame)
+            legacy = f"{legacy_elapsed:.2f}"
+            speedup = f"{legacy_elapsed / elapsed:.1f}x"
+        size = len(output.getvalue()) / 1e6
+        print(f"{rows:>8} {elapsed:>8.2f} {rows / elapsed:>9.0f} {size:>6.1f} {legacy:>9} {speedup:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""PDF export throughput: the streaming table engine against the original converter.
+
+Run from the repository root:
+
+    python benchmarks/bench_pdf_export.py --rows 1000 10000 100000
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from datasets import make_cheque_records, readable
+from legacy_exports import convert_df_to_pdf as legacy_convert_df_to_pdf
+from utils.pdf_table import write_pdf_table
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--legacy-max-rows", type=int, default=10000,
+                        help="skip the original converter above this size (it is quadratic-ish in practice)")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'engine s':>9} {'rows/s':>10} {'MB':>7} {'legacy s':>9} {'speedup':>8}")
+    for rows in args.rows:
+        frame = readable(make_cheque_records(rows))
+        elapsed, size = timed(write_pdf_table, frame, io.BytesIO())
+
+        legacy = "-"
+        speedup = "-"
+        if rows <= args.legacy_max_rows:
+            legacy_elapsed, _ = timed(legacy_convert_df_to_pdf, frame)
+            legacy = f"{legacy_elapsed:.2f}"
+            speedup = f"{legacy_elapsed / elapsed:.1f}x"
+        print(f"{rows:>8} {elapsed:>9.2f} {rows / elapsed:>10.0f} {size / 1e6:>7.1f} {legacy:>9} {speedup:>8}")
+
+
+if __name__ == "__main__":
+    main()
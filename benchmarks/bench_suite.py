@@ -0,0 +1,329 @@
+"""Offline benchmark suite: extraction, page filtering, inserts, Dashboard data prep and exports.
+
+Runs against a stub Gemini model and an in-memory Supabase stand-in, on
+synthetic cheque tables of each size, and writes the timings to a JSON file.
+Pass the file from a previous release as --baseline to flag regressions.
+Run from the repository root:
+
+    python benchmarks/bench_suite.py --sizes 1000 10000 100000 1000000 --output benchmark-results.json
+    python benchmarks/bench_suite.py --baseline old-results.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-stub")
+os.environ.setdefault("GEMINI_RATE_PER_MINUTE", "1000000")
+os.environ.setdefault("GEMINI_RATE_BURST", "1000")
+os.environ.setdefault("METRICS_JSON_LOGS", "false")
+os.environ["EXTRACTION_CACHE_ENABLED"] = "false"
+os.environ["AGGREGATES_MODE"] = "local"
+
+import logging
+
+import pandas as pd
+from PIL import Image, ImageDraw
+
+import apiconfig
+import dbconnection
+from datasets import make_cheque_records
+from stubs import InMemorySupabase, StubGenerativeModel
+from utils.chart_data import monthly_series, time_series, top_categories
+from utils.columnar_mirror import ChequeMirror
+from utils.dataset_cache import ChequeDataset
+from utils.duplicate_index import DuplicateIndex
+from utils.exports import EXPORT_FORMATS, readable_frame
+from utils.grid_source import fetch_grid_block, grid_query
+from utils.job_queue import JobQueue
+from utils.page_filter import classify_page
+from utils.schema import memory_report, to_display_frame, to_typed_frame
+
+TABLE = "cheque_details_tbl"
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def use_database(records=None):
+    """Point dbconnection at a fresh in-memory database, optionally seeded with records."""
+    database = InMemorySupabase()
+    if records is not None:
+        database.load(TABLE, records.to_dict("records"))
+    dbconnection.supabase = database
+    return database
+
+
+def bench_extraction(pages, workers, latency, error_rate):
+    apiconfig.model = StubGenerativeModel(latency=latency, error_rate=error_rate)
+    # retry quickly: the stub's outages are independent draws, not real backpressure
+    apiconfig.gemini_caller.base_delay = latency
+    payloads = []
+    for i in range(pages):
+        buffer = io.BytesIO()
+        Image.new("RGB", (1200, 560), (255, 255 - i % 200, 255)).save(buffer, format="JPEG")
+        payloads.append(buffer.getvalue())
+
+    def prepare(file_type, data, first_page):
+        for idx in range(first_page, pages):
+            yield idx, payloads[idx], None
+
+    def handler(jobs):
+        # as the Upload page's worker: one batch request, an error message per failed page
+        results = apiconfig.extract_cheque_details_batch([image for image, _, _ in jobs], batch_size=apiconfig.GEMINI_BATCH_SIZE)
+        return [None if details else "extraction failed" for details in results]
+
+    # the Upload page's path: a durable queue drained by EXTRACTION_WORKERS background workers
+    path = tempfile.mkdtemp(prefix="checkmate-jobs-")
+    try:
+        queue = JobQueue(os.path.join(path, "jobs.sqlite3"), retry_delay=latency)
+        start = time.perf_counter()
+        queue.create_upload("benchmark.pdf", "benchmark", "application/pdf", b"")
+        queue.start_workers(workers, handler, prepare, batch_size=apiconfig.GEMINI_BATCH_SIZE)
+        while True:
+            status = queue.upload_status(limit=1)[0]
+            if status["status"] == "complete" and status["finished"] == pages:
+                break
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - start
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+    return {"name": "extraction", "rows": pages, "seconds": elapsed, "per_second": pages / elapsed,
+            "workers": workers, "batch_size": apiconfig.GEMINI_BATCH_SIZE, "latency": latency, "error_rate": error_rate,
+            "failed": status["failed"], "retries": apiconfig.gemini_caller.stats()["retries"]}
+
+
+def bench_page_filter(pages):
+    # A4 scans at 200 dpi: every other page blank, the rest with a cheque in the top third
+    images = []
+    for i in range(pages):
+        image = Image.new("L", (1654, 2339), 245)
+        if i % 2:
+            draw = ImageDraw.Draw(image)
+            draw.rectangle((120, 150, 1520, 800), outline=40, width=4)
+            for line in range(6):
+                draw.line((200, 260 + line * 90, 1100, 260 + line * 90), fill=60, width=3)
+        images.append(image)
+    elapsed, reasons = timed(lambda: [classify_page(image, "blank")[0] for image in images])
+    return {"name": "page_filter", "rows": pages, "seconds": elapsed, "per_second": pages / elapsed,
+            "skipped": sum(reason is not None for reason in reasons)}
+
+
+def bench_insert(frame):
+    use_database()
+    details = frame.drop(columns=["id", "uploaded_at"]).to_dict("records")
+    elapsed, inserted = timed(dbconnection.insert_cheque_details_bulk, details)
+    return {"name": "insert", "rows": len(frame), "seconds": elapsed, "per_second": inserted / elapsed}
+
+
+def bench_duplicates(frame):
+    database = use_database(frame)
+    details = frame.drop(columns=["id", "uploaded_at"]).to_dict("records")
+    index = DuplicateIndex(capacity=len(frame), refresh_seconds=float("inf"))
+    warm_seconds, _ = timed(index.might_contain, details[0])
+    check_seconds, hits = timed(lambda: sum(index.might_contain(row) for row in details))
+    # re-inserting every stored row: the upsert must write none of them
+    replay_seconds, written = timed(dbconnection.insert_cheque_details_bulk, details)
+    stats = index.stats()
+    return [
+        {"name": "duplicates.index_warm", "rows": len(frame), "seconds": warm_seconds, "per_second": len(frame) / warm_seconds,
+         "bytes": stats["bytes"], "error_rate": stats["error_rate"]},
+        {"name": "duplicates.index_check", "rows": len(frame), "seconds": check_seconds, "per_second": len(frame) / check_seconds,
+         "hits": hits},
+        {"name": "duplicates.replay_insert", "rows": len(frame), "seconds": replay_seconds, "per_second": len(frame) / replay_seconds,
+         "written": written, "stored": len(database.tables[TABLE].rows)},
+    ]
+
+
+def prep_overview(dataset, today):
+    overview = dbconnection.fetch_overview_counts(today)
+    upload_counts, _ = time_series(dbconnection.fetch_daily_counts(), "upload_date")
+    bank_counts = top_categories(pd.DataFrame(dbconnection.fetch_bank_summary(), columns=["bank_name", "cheque_count"]), "bank_name", "cheque_count")
+    # the records table fetches and ships only its first page
+    rows, total = dbconnection.fetch_cheque_page(0, 50)
+    records = to_display_frame(to_typed_frame(rows)).to_json(orient="records")
+    return overview, upload_counts, bank_counts, records, total
+
+
+def prep_analytics(dataset, today):
+    bank_summary = top_categories(pd.DataFrame(dbconnection.fetch_bank_summary(), columns=["bank_name", "cheque_count", "total_amount"]), "bank_name", "total_amount")
+    upload_counts, _ = time_series(dbconnection.fetch_daily_counts(), "upload_date")
+    monthly_counts = monthly_series(dbconnection.fetch_monthly_counts(), "upload_month")
+    return bank_summary, upload_counts, monthly_counts
+
+
+def prep_reports(dataset, today):
+    overview = dbconnection.fetch_overview_counts(today)
+    start_date = pd.to_datetime(overview["first_upload_date"]).date()
+    end_date = pd.to_datetime(overview["last_upload_date"]).date()
+    return dbconnection.fetch_amount_stats(start_date, end_date)
+
+
+def prep_tables(dataset, today):
+    # the grid receives one block per sort/filter/page request
+    block, _ = fetch_grid_block(grid_query(None), 1, 100)
+    records = block.to_json(orient="records")
+    summary = pd.DataFrame(dbconnection.fetch_bank_summary(), columns=["bank_name", "cheque_count", "total_amount"])
+    return records, summary
+
+
+DASHBOARD_TABS = {"overview": prep_overview, "analytics": prep_analytics, "reports": prep_reports, "tables": prep_tables}
+
+
+def bench_dashboard(frame):
+    use_database(frame)
+    today = datetime.now(timezone.utc).date()
+    dataset = ChequeDataset(refresh_seconds=float("inf"))
+    results = []
+    elapsed, _ = timed(dataset.get_frame)
+    results.append({"name": "dashboard.dataset_sync", "rows": len(frame), "seconds": elapsed, "per_second": len(frame) / elapsed})
+    for tab, prep in DASHBOARD_TABS.items():
+        elapsed, _ = timed(prep, dataset, today)
+        results.append({"name": f"dashboard.{tab}", "rows": len(frame), "seconds": elapsed, "per_second": len(frame) / elapsed})
+    return results
+
+
+def run_aggregates(aggregate, today):
+    """Every aggregate the Dashboard and Reports tabs request."""
+    overview = aggregate("cheque_overview", {"for_date": today.isoformat()})[0]
+    aggregate("cheque_daily_counts", {})
+    aggregate("cheque_monthly_counts", {})
+    aggregate("cheque_bank_summary", {})
+    if overview["first_upload_date"]:
+        aggregate("cheque_amount_stats", {"start_date": overview["first_upload_date"], "end_date": overview["last_upload_date"]})
+
+
+def bench_mirror(frame):
+    use_database(frame)
+    today = datetime.now(timezone.utc).date()
+    path = tempfile.mkdtemp(prefix="checkmate-mirror-")
+    try:
+        mirror = ChequeMirror(path, refresh_seconds=float("inf"))
+        refresh_seconds, _ = timed(mirror.refresh)
+        size = mirror.stats()["bytes"]
+        local_seconds, _ = timed(run_aggregates, dbconnection._aggregate_locally, today)
+        mirror_seconds, _ = timed(run_aggregates, mirror.aggregate, today)
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+    return [
+        {"name": "mirror.refresh", "rows": len(frame), "seconds": refresh_seconds, "per_second": len(frame) / refresh_seconds, "bytes": size},
+        {"name": "aggregates.local", "rows": len(frame), "seconds": local_seconds, "per_second": len(frame) / local_seconds},
+        {"name": "aggregates.mirror", "rows": len(frame), "seconds": mirror_seconds, "per_second": len(frame) / mirror_seconds},
+    ]
+
+
+def bench_schema(frame):
+    elapsed, typed = timed(to_typed_frame, frame)
+    report = memory_report(frame, typed)
+    # pandas < 3 loads the rows as object columns; pandas 3 as its str dtype
+    object_report = memory_report(frame.astype(object), typed)
+    return {"name": "schema.typed_frame", "rows": len(frame), "seconds": elapsed, "per_second": len(frame) / elapsed,
+            "raw_bytes": report["raw_bytes"], "object_bytes": object_report["raw_bytes"], "typed_bytes": report["typed_bytes"]}
+
+
+def bench_exports(frame, max_rows):
+    results = []
+    typed = to_typed_frame(frame)
+    for fmt, (converter, _, _) in EXPORT_FORMATS.items():
+        if max_rows and len(frame) > max_rows:
+            results.append({"name": f"export.{fmt}", "rows": len(frame), "skipped": f"over --export-max-rows {max_rows}"})
+            continue
+        # as get_export builds it: display strings, then the converter
+        elapsed, output = timed(lambda: converter(readable_frame(typed)))
+        size = len(output.getvalue()) if hasattr(output, "getvalue") else len(output)
+        results.append({"name": f"export.{fmt}", "rows": len(frame), "seconds": elapsed,
+                        "per_second": len(frame) / elapsed, "bytes": size})
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, tolerance):
+    """Print timings that got slower than the baseline by more than tolerance; return their count."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(entry["name"], entry["rows"]): entry for entry in json.load(f)["results"] if "seconds" in entry}
+
+    regressions = 0
+    print(f"\nAgainst {baseline_path} (tolerance {tolerance:.0%}):")
+    for entry in results:
+        old = baseline.get((entry["name"], entry["rows"]))
+        if old is None or "seconds" not in entry:
+            continue
+        ratio = entry["seconds"] / old["seconds"] if old["seconds"] else float("inf")
+        flag = "REGRESSION" if ratio > 1 + tolerance else ""
+        regressions += bool(flag)
+        print(f"{entry['name']:>26} {entry['rows']:>9} {old['seconds']:>9.3f}s -> {entry['seconds']:>9.3f}s {ratio:>6.2f}x {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--pages", type=int, default=64, help="pages for the extraction benchmark")
+    parser.add_argument("--workers", type=int, default=apiconfig.EXTRACTION_WORKERS)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub model latency per request, in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="fraction of stub requests that fail with a 503")
+    parser.add_argument("--export-max-rows", type=int, default=100000, help="skip exports of larger tables (0 for no limit)")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="slowdown over the baseline reported as a regression")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = [bench_extraction(args.pages, args.workers, args.latency, args.error_rate),
+               bench_page_filter(args.pages)]
+    for rows in args.sizes:
+        frame = make_cheque_records(rows)
+        results.append(bench_insert(frame))
+        results.extend(bench_duplicates(frame))
+        results.append(bench_schema(frame))
+        results.extend(bench_dashboard(frame))
+        results.extend(bench_mirror(frame))
+        results.extend(bench_exports(frame, args.export_max_rows))
+        del frame
+
+    print(f"{'benchmark':>26} {'rows':>9} {'seconds':>9} {'rows/s':>10}")
+    for entry in results:
+        if "seconds" in entry:
+            print(f"{entry['name']:>26} {entry['rows']:>9} {entry['seconds']:>9.3f} {entry['per_second']:>10.0f}")
+        else:
+            print(f"{entry['name']:>26} {entry['rows']:>9} {'skipped':>9}")
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.output}")
+
+    if args.baseline and compare(results, args.baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
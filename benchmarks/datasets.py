@@ -0,0 +1,30 @@
+"""Synthetic cheque records for the benchmarks."""
+import numpy as np
+import pandas as pd
+
+BANKS = ["HDFC Bank", "State Bank of India", "ICICI Bank", "Axis Bank", "Kotak Mahindra Bank",
+         "Punjab National Bank", "Bank of Baroda", "Canara Bank", "Union Bank of India", "IDFC First Bank"]
+
+
+def make_cheque_records(rows, seed=0):
+    """Rows shaped like cheque_details_tbl, with string amounts as the API stores them."""
+    rng = np.random.default_rng(seed)
+    uploaded_at = pd.Timestamp("2024-01-01", tz="UTC") + pd.to_timedelta(np.sort(rng.integers(0, 730 * 86400, rows)), unit="s")
+    cheque_date = (uploaded_at - pd.to_timedelta(rng.integers(0, 30, rows), unit="D")).strftime("%Y-%m-%d")
+    return pd.DataFrame({
+        "id": np.arange(1, rows + 1),
+        "cheque_date": cheque_date,
+        "account_number": rng.integers(10**9, 10**10, rows).astype(str),
+        "bank_name": rng.choice(BANKS, rows),
+        "cheque_number": pd.Series(rng.integers(0, 10**6, rows)).map("{:06d}".format),
+        "payee_name": pd.Series(rng.integers(0, 5000, rows)).map("Payee Name {}".format),
+        "amount": rng.integers(100, 500000, rows).astype(str),
+        "uploaded_at": uploaded_at.strftime("%Y-%m-%dT%H:%M:%S+00:00"),
+        "status": rng.choice(["Processed"] * 19 + ["Failed"], rows),
+    })
+
+
+def readable(frame):
+    """Column selection and titles used by the Exports page."""
+    columns = ["cheque_date", "account_number", "bank_name", "cheque_number", "payee_name", "amount", "uploaded_at", "status"]
+    return frame[columns].rename(columns=lambda x: x.replace("_", " ").title())
@@ -0,0 +1,72 @@
+"""Export converters as they were before the PDF and DOCX engines, kept as benchmark baselines."""
+import io
+
+from docx import Document
+from fpdf import FPDF
+
+
+# original convert_df_to_pdf
+def convert_df_to_pdf(dataframe):
+    pdf = FPDF("L", "mm", "A4")
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    pdf.set_font("Arial", size=10)
+
+    col_widths = [max(pdf.get_string_width(str(col)) + 10, 30) for col in dataframe.columns]
+    row_height = 8
+    max_page_height = 190 
+
+    # write column headers
+    for i, col in enumerate(dataframe.columns):
+        pdf.cell(col_widths[i], row_height, col, border=1)
+    pdf.ln()
+
+    for _, row in dataframe.iterrows():
+        row_data = [str(item) for item in row]
+
+        # calculate max line height for the row
+        max_lines = max(pdf.get_string_width(item) // col_widths[i] + 1 for i, item in enumerate(row_data))
+        dynamic_row_height = row_height * max_lines
+
+        # check if a new page is required
+        if pdf.get_y() + dynamic_row_height > max_page_height:
+            pdf.add_page()
+            for i, col in enumerate(dataframe.columns):
+                pdf.cell(col_widths[i], row_height, col, border=1)
+            pdf.ln()
+
+        # write row data
+        y_start = pdf.get_y()
+        for i, item in enumerate(row_data):
+            x_start = pdf.get_x()
+            pdf.multi_cell(col_widths[i], row_height, item, border=1, align="L")
+            pdf.set_xy(x_start + col_widths[i], y_start)  # Move to next column
+        pdf.ln(dynamic_row_height)
+
+    # save PDF to memory
+    output = io.BytesIO()
+    pdf_data = pdf.output(dest="S").encode("latin1")
+    output.write(pdf_data)
+    output.seek(0)
+    return output
+
+# original convert_df_to_docx
+def convert_df_to_docx(dataframe):
+    doc = Document()
+    doc.add_heading("Cheque Records", level=1)
+
+    table = doc.add_table(rows=1, cols=len(dataframe.columns))
+    hdr_cells = table.rows[0].cells
+    for i, col_name in enumerate(dataframe.columns):
+        hdr_cells[i].text = col_name
+
+    for _, row in dataframe.iterrows():
+        row_cells = table.add_row().cells
+        for i, item in enumerate(row):
+            row_cells[i].text = str(item)
+
+    output = io.BytesIO()
+    doc.save(output)
+    output.seek(0)
+    return output
+
@@ -0,0 +1,247 @@
+"""Offline stand-ins for Gemini and Supabase used by the benchmark suite."""
+import bisect
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from google.api_core import exceptions as google_exceptions
+
+from dbconnection import cheque_key
+
+DETAILS = {
+    "payee_name": "Benchmark Payee",
+    "cheque_date": "2025-02-20",
+    "cheque_number": "000123",
+    "account_number": "1234567890",
+    "bank_name": "Benchmark Bank",
+    "amount": "20000",
+}
+
+
+class StubGenerativeModel:
+    """Stands in for GenerativeModel: sleeps for a jittered latency and fails at error_rate.
+
+    Failures raise ServiceUnavailable, like a 503 from the API, so they go
+    through the same retry path as real outages. Multi-image requests get a
+    JSON array with one object per image.
+    """
+
+    def __init__(self, latency=0.5, error_rate=0.0, jitter=0.2, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, contents, **kwargs):
+        with self._lock:
+            self.requests += 1
+            delay = self.latency * (1 + self.random.uniform(-self.jitter, self.jitter))
+            failed = self.random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        time.sleep(delay)
+        if failed:
+            raise google_exceptions.ServiceUnavailable("stub model outage")
+
+        images = len(contents) - 1
+        payload = DETAILS if images == 1 else [DETAILS] * images
+        usage = SimpleNamespace(prompt_token_count=300 + 258 * images, candidates_token_count=60 * images)
+        return SimpleNamespace(text=json.dumps(payload), usage_metadata=usage)
+
+
+_KEYSET = re.compile(r'uploaded_at\.gt\."(.*?)",and\(uploaded_at\.eq\."(.*?)",id\.gt\.(\d+)\)')
+_ILIKE = re.compile(r'(\w+)\.ilike\."((?:[^"\\]|\\.)*)"')
+
+
+class _Table:
+    """Rows kept sorted by (uploaded_at, id), the order every app query uses.
+
+    cheque_key is filled in like the generated column of sql/cheque_key.sql
+    and is unique among inserted rows; load() does not enforce it.
+    """
+
+    def __init__(self):
+        self.rows = []
+        self.keys = []
+        self.cheque_keys = set()
+        self.next_id = 1
+        self.lock = threading.Lock()
+
+    def insert(self, rows, skip_duplicates=False, unique=True):
+        inserted = []
+        with self.lock:
+            for row in rows:
+                row = dict(row)
+                row["cheque_key"] = cheque_key(row)
+                if unique and row["cheque_key"] is not None and row["cheque_key"] in self.cheque_keys:
+                    if skip_duplicates:
+                        continue
+                    raise RuntimeError('duplicate key value violates unique constraint "idx_cheque_details_cheque_key"')
+                if row["cheque_key"] is not None:
+                    self.cheque_keys.add(row["cheque_key"])
+                row.setdefault("id", self.next_id)
+                row.setdefault("uploaded_at", datetime.now(timezone.utc).isoformat())
+                self.next_id = max(self.next_id, row["id"]) + 1
+                key = (row["uploaded_at"], row["id"])
+                if self.keys and key < self.keys[-1]:
+                    position = bisect.bisect(self.keys, key)
+                    self.keys.insert(position, key)
+                    self.rows.insert(position, row)
+                else:
+                    self.keys.append(key)
+                    self.rows.append(row)
+                inserted.append(row)
+        return inserted
+
+
+class _Query:
+    """The subset of postgrest-py's query builder the app uses."""
+
+    def __init__(self, table):
+        self.table = table
+        self.projection = None
+        self.count = None
+        self.payload = None
+        self.skip_duplicates = False
+        self.filters = []
+        self.lower_key = None
+        self.ordering = []
+        self.offset = 0
+        self.limit_rows = None
+        self.negate_next = False
+
+    def _filter(self, check):
+        if self.negate_next:
+            self.negate_next = False
+            self.filters.append(lambda row: not check(row))
+        else:
+            self.filters.append(check)
+        return self
+
+    @property
+    def not_(self):
+        self.negate_next = True
+        return self
+
+    def select(self, projection="*", count=None):
+        self.projection = None if projection == "*" else [col.strip() for col in projection.split(",")]
+        self.count = count
+        return self
+
+    def insert(self, rows):
+        self.payload = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def upsert(self, rows, on_conflict="", ignore_duplicates=False):
+        if on_conflict != "cheque_key" or not ignore_duplicates:
+            raise NotImplementedError("Only ON CONFLICT (cheque_key) DO NOTHING is supported")
+        self.skip_duplicates = True
+        return self.insert(rows)
+
+    def eq(self, column, value):
+        return self._filter(lambda row: str(row.get(column)) == str(value))
+
+    def neq(self, column, value):
+        return self._filter(lambda row: row.get(column) is not None and str(row[column]) != str(value))
+
+    def gt(self, column, value):
+        return self._filter(lambda row: row.get(column) is not None and str(row[column]) > str(value))
+
+    def gte(self, column, value):
+        return self._filter(lambda row: row.get(column) is not None and str(row[column]) >= str(value))
+
+    def lt(self, column, value):
+        return self._filter(lambda row: row.get(column) is not None and str(row[column]) < str(value))
+
+    def lte(self, column, value):
+        return self._filter(lambda row: row.get(column) is not None and str(row[column]) <= str(value))
+
+    def ilike(self, column, pattern):
+        regex = re.compile("".join(".*" if ch in "*%" else re.escape(ch) for ch in pattern), re.IGNORECASE | re.DOTALL)
+        return self._filter(lambda row: row.get(column) is not None and regex.fullmatch(str(row[column])) is not None)
+
+    def or_(self, expression):
+        match = _KEYSET.fullmatch(expression)
+        if match:
+            self.lower_key = (match.group(1), int(match.group(3)))
+            return self
+        terms = _ILIKE.findall(expression)
+        if not terms:
+            raise NotImplementedError(f"Unsupported or_ filter: {expression}")
+        # *text* patterns only: a case-insensitive substring match on any column
+        terms = [(column, re.sub(r'\\(.)', r'\1', pattern).strip("*").lower()) for column, pattern in terms]
+        self.filters.append(lambda row: any(text in str(row.get(column) or "").lower() for column, text in terms))
+        return self
+
+    def order(self, column, desc=False):
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, rows):
+        self.limit_rows = rows
+        return self
+
+    def range(self, start, end):
+        self.offset = start
+        self.limit_rows = end - start + 1
+        return self
+
+    def _project(self, row):
+        if self.projection is None:
+            return dict(row)
+        return {col: row.get(col) for col in self.projection}
+
+    def execute(self):
+        if self.payload is not None:
+            return SimpleNamespace(data=self.table.insert(self.payload, self.skip_duplicates), count=None)
+
+        with self.table.lock:
+            natural = all(not desc for _, desc in self.ordering) and [col for col, _ in self.ordering] in ([], ["uploaded_at"], ["uploaded_at", "id"])
+            start = bisect.bisect_right(self.table.keys, self.lower_key) if self.lower_key else 0
+            if natural and self.count is None:
+                # walk the sorted rows from the keyset and stop once the page is full
+                wanted = None if self.limit_rows is None else self.offset + self.limit_rows
+                matched = []
+                for row in self.table.rows[start:] if start else self.table.rows:
+                    if all(check(row) for check in self.filters):
+                        matched.append(row)
+                        if wanted is not None and len(matched) >= wanted:
+                            break
+                total = None
+            else:
+                matched = [row for row in self.table.rows[start:] if all(check(row) for check in self.filters)]
+                for column, desc in reversed(self.ordering):
+                    matched.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+                total = len(matched)
+
+        end = None if self.limit_rows is None else self.offset + self.limit_rows
+        return SimpleNamespace(data=[self._project(row) for row in matched[self.offset:end]], count=total)
+
+
+class InMemorySupabase:
+    """Stands in for the Supabase client with in-memory tables.
+
+    RPC calls fail as if sql/aggregates.sql had not been applied, so the app
+    computes aggregates locally, through the same paginated reads it would
+    issue against a real database.
+    """
+
+    def __init__(self):
+        self.tables = {}
+
+    def table(self, name):
+        return _Query(self.tables.setdefault(name, _Table()))
+
+    def rpc(self, name, params=None):
+        raise RuntimeError(f"{{'code': 'PGRST202', 'message': 'Could not find the function public.{name} in the schema cache'}}")
+
+    def load(self, name, records):
+        """Seed a table with rows that already carry id and uploaded_at."""
+        self.tables.setdefault(name, _Table()).insert(records, unique=False)
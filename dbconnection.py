@@ -1,7 +1,13 @@
+import json
 import logging
 import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from utils.clients import get_client_manager, http_pool_stats, pooled_http_client
+from utils.metrics import get_metrics
 
 # load environment variables
 load_dotenv()
@@ -13,21 +19,160 @@ logging.basicConfig(level=logging.INFO)
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-# initialize Supabase client
-supabase: Client = None
+# bulk insert and write-behind settings
+INSERT_CHUNK_SIZE = int(os.getenv("INSERT_CHUNK_SIZE", "500"))
+WRITE_BUFFER_MAX_ROWS = int(os.getenv("WRITE_BUFFER_MAX_ROWS", "50"))
+WRITE_BUFFER_MAX_DELAY = float(os.getenv("WRITE_BUFFER_MAX_DELAY", "2.0"))
+# failed flushes are retried after max_delay, doubling up to this many seconds
+WRITE_BUFFER_MAX_BACKOFF = 60.0
+FETCH_PAGE_SIZE = int(os.getenv("FETCH_PAGE_SIZE", "1000"))
+INSERT_JOURNAL_PATH = os.getenv("INSERT_JOURNAL_PATH", os.path.join(".checkmate", "insert_journal.jsonl"))
+# auto upserts on the cheque_key column of sql/cheque_key.sql and falls back to plain inserts when it is missing;
+# upsert or insert forces one path
+DUPLICATE_KEY_MODE = os.getenv("DUPLICATE_KEY_MODE", "auto")
+_upsert_available = DUPLICATE_KEY_MODE in ("auto", "upsert")
+
+# initialize Supabase client (created on first use, once per process; tests and benchmarks may assign a stand-in)
+supabase = None
+_connect_lock = threading.RLock()
+
+# callbacks run after rows are inserted
+_insert_listeners = []
+
+def on_insert(callback):
+    """Register a callback to run after cheque details are inserted."""
+    _insert_listeners.append(callback)
+
+def _notify_insert():
+    for callback in _insert_listeners:
+        try:
+            callback()
+        except Exception as err:
+            logging.error(f"Insert listener failed: {err}")
+
+def _build_client():
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        raise ValueError("Missing Supabase URL or API Key in environment variables.")
+    # deferred: the client pulls in httpx, postgrest, realtime and storage
+    from supabase import create_client
+    from supabase.lib.client_options import SyncClientOptions
+
+    client = create_client(SUPABASE_URL, SUPABASE_KEY, options=SyncClientOptions(httpx_client=pooled_http_client()))
+    # build the PostgREST client now: its lazy property is not thread-safe
+    client.postgrest
+    return client
+
+def _ping_client(client):
+    client.table("cheque_details_tbl").select("id").limit(1).execute()
+
+def _use_client(old, new):
+    global supabase
+    # a stand-in assigned by tests or benchmarks is left alone
+    if supabase is old:
+        supabase = new
+
+_client = get_client_manager().register(
+    "supabase", _build_client, _ping_client,
+    close=lambda client: client.options.httpx_client.close(),
+    pool_stats=lambda client: http_pool_stats(client.options.httpx_client),
+)
+_client.on_reconnect(_use_client)
 
 def init_db_connection():
     """Initialize Supabase connection."""
     global supabase
-    if supabase is None:
-        if not SUPABASE_URL or not SUPABASE_KEY:
-            raise ValueError("Missing Supabase URL or API Key in environment variables.")
-        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-        logging.info("Connected to Supabase successfully.")
+    if supabase is not None:
+        _client.check_if_due()
+        return
+    with _connect_lock:
+        if supabase is None:
+            supabase = _client.get()
+            logging.info("Connected to Supabase successfully.")
+            # the buffer takes over rows a previous process journaled but never wrote
+            get_write_buffer()
+
+def _build_row(details):
+    """Map extracted cheque details onto a cheque_details_tbl row."""
+    return {
+        "cheque_date": details.get("cheque_date", ""),
+        "account_number": details.get("account_number", ""),
+        "bank_name": details.get("bank_name", ""),
+        "cheque_number": details.get("cheque_number", ""),
+        "payee_name": details.get("payee_name", ""),
+        "amount": details.get("amount", ""),
+        "status": details.get("status", "Processed"),
+    }
+
+def cheque_key(details):
+    """Natural key of a cheque: bank name, account number and cheque number, normalized.
+
+    Matches cheque_natural_key() in sql/cheque_key.sql: the bank name is
+    lowercased with its whitespace collapsed, and spaces and hyphens are
+    dropped from the numbers. None when any part is missing.
+    """
+    bank = " ".join(str(details.get("bank_name") or "").lower().split())
+    account = re.sub(r"[\s-]", "", str(details.get("account_number") or ""))
+    cheque = re.sub(r"[\s-]", "", str(details.get("cheque_number") or ""))
+    if not (bank and account and cheque):
+        return None
+    return f"{bank}|{account}|{cheque}"
+
+def _cheque_key_missing(err):
+    # undefined column, or no unique index to resolve ON CONFLICT against
+    text = str(err)
+    return "cheque_key" in text or "42P10" in text or "42703" in text
+
+def _write_rows(rows):
+    """Write rows, skipping cheques whose natural key is already stored. Returns the rows written."""
+    global _upsert_available
+    if _upsert_available:
+        try:
+            # ON CONFLICT DO NOTHING: replays and re-uploads are no-ops
+            response = supabase.table("cheque_details_tbl").upsert(rows, on_conflict="cheque_key", ignore_duplicates=True).execute()
+            return response.data or []
+        except Exception as err:
+            if DUPLICATE_KEY_MODE == "upsert" or not _cheque_key_missing(err):
+                raise
+            logging.warning(f"cheque_key unavailable, inserting without duplicate checks: {err}")
+            _upsert_available = False
+
+    response = supabase.table("cheque_details_tbl").insert(rows).execute()
+    if not response.data:
+        raise RuntimeError(f"Failed to insert cheque details: {getattr(response, 'error', None)}")
+    return response.data
+
+def _record_written(attempted, written):
+    get_metrics().incr("rows_inserted", written)
+    if attempted > written:
+        logging.info(f"Skipped {attempted - written} duplicate cheque(s) already stored.")
+        get_metrics().incr("duplicates_ignored", attempted - written)
+    if written:
+        _notify_insert()
+
+def find_duplicate_cheque(details):
+    """Return the id and uploaded_at of the stored cheque with the same natural key, or None."""
+    global _upsert_available
+    key = cheque_key(details)
+    if key is None:
+        return None
+    init_db_connection()
+    if _upsert_available:
+        try:
+            rows = supabase.table("cheque_details_tbl").select("id,uploaded_at").eq("cheque_key", key).limit(1).execute().data
+            return rows[0] if rows else None
+        except Exception as err:
+            if DUPLICATE_KEY_MODE == "upsert" or not _cheque_key_missing(err):
+                raise
+            logging.warning(f"cheque_key unavailable, matching duplicates on the raw columns: {err}")
+            _upsert_available = False
+    rows = (supabase.table("cheque_details_tbl").select("id,uploaded_at")
+            .eq("bank_name", details.get("bank_name")).eq("account_number", details.get("account_number"))
+            .eq("cheque_number", details.get("cheque_number")).limit(1).execute().data)
+    return rows[0] if rows else None
 
 # insert cheque details into Supabase
 def insert_cheque_details(details):
-    """Insert cheque details into Supabase."""
+    """Insert cheque details into Supabase, unless the same cheque is already stored."""
     try:
         init_db_connection()
 
@@ -35,37 +180,450 @@ def insert_cheque_details(details):
             logging.error("Invalid cheque details. Skipping insert.")
             return
 
-        data = {
-            "cheque_date": details.get("cheque_date", ""),
-            "account_number": details.get("account_number", ""),
-            "bank_name": details.get("bank_name", ""),
-            "cheque_number": details.get("cheque_number", ""),
-            "payee_name": details.get("payee_name", ""),
-            "amount": details.get("amount", ""),
-            "status": details.get("status", "Processed"),
-        }
-        response = supabase.table("cheque_details_tbl").insert(data).execute()
-
-        if response.data:
+        data = _build_row(details)
+        with get_metrics().stage("insert", rows=1):
+            written = _write_rows([data])
+
+        if written:
             logging.info("Cheque details inserted successfully.")
-        else:
-            logging.error(f"Failed to insert cheque details: {response.error}")
+        _record_written(1, len(written))
 
     except Exception as err:
         logging.error(f"Error inserting cheque details: {err}")
         raise
 
+# insert many cheque details in chunked multi-row inserts
+def insert_cheque_details_bulk(details_list, chunk_size=None):
+    """Insert a list of cheque details, one round-trip per chunk. Returns the number of rows inserted.
+
+    Cheques already stored (by natural key) are skipped, so replaying the
+    same rows is safe.
+    """
+    init_db_connection()
+
+    rows = [_build_row(details) for details in details_list if details and isinstance(details, dict)]
+    if len(rows) != len(details_list):
+        logging.error(f"Skipping {len(details_list) - len(rows)} invalid cheque details.")
+
+    chunk_size = max(1, chunk_size or INSERT_CHUNK_SIZE)
+    inserted = 0
+    try:
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            with get_metrics().stage("insert", rows=len(chunk)):
+                written = _write_rows(chunk)
+            inserted += len(written)
+            _record_written(len(chunk), len(written))
+        logging.info(f"Inserted {inserted} cheque details in {-(-len(rows) // chunk_size)} chunk(s).")
+        return inserted
+    except Exception as err:
+        logging.error(f"Error inserting cheque details after {inserted} rows: {err}")
+        raise
+
+def _read_journal(path):
+    """Read buffered rows from the journal, ignoring a torn final line."""
+    rows = []
+    if not os.path.exists(path):
+        return rows
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError:
+                logging.warning("Skipping corrupt line in insert journal.")
+    return rows
+
+class WriteBehindBuffer:
+    """Buffer cheque inserts and write them in bulk.
+
+    Rows are appended to a local journal before being buffered, so a crash
+    loses nothing: the journal always holds exactly the buffered rows, and a
+    new buffer starts with the rows a previous process left in it.
+    The buffer flushes once it holds max_rows rows or its oldest row is
+    older than max_delay seconds. After a failed flush only the timer
+    retries, backing off up to WRITE_BUFFER_MAX_BACKOFF seconds.
+    """
+
+    def __init__(self, max_rows=None, max_delay=None, journal_path=None):
+        self.max_rows = max_rows or WRITE_BUFFER_MAX_ROWS
+        self.max_delay = max_delay if max_delay is not None else WRITE_BUFFER_MAX_DELAY
+        self.journal_path = journal_path or INSERT_JOURNAL_PATH
+        self._rows = []
+        self._oldest = None
+        self._lock = threading.RLock()
+        self._timer = None
+        self._failures = 0
+
+        journal_dir = os.path.dirname(self.journal_path)
+        if journal_dir:
+            os.makedirs(journal_dir, exist_ok=True)
+
+        recovered = _read_journal(self.journal_path)
+        if recovered:
+            logging.info(f"Recovered {len(recovered)} buffered cheque details from {self.journal_path}.")
+            # rewrite the journal without a torn final line before new rows are appended to it
+            with open(self.journal_path, "w", encoding="utf-8") as journal:
+                journal.writelines(json.dumps(row) + "\n" for row in recovered)
+                journal.flush()
+                os.fsync(journal.fileno())
+            self._rows = recovered
+            self._oldest = time.monotonic()
+            self._schedule_flush(0)
+
+    def add(self, details):
+        """Journal and buffer one cheque's details, flushing if the buffer is full."""
+        if not details or not isinstance(details, dict):
+            logging.error("Invalid cheque details. Skipping insert.")
+            return
+        init_db_connection()
+        row = _build_row(details)
+        with self._lock:
+            with open(self.journal_path, "a", encoding="utf-8") as journal:
+                journal.write(json.dumps(row) + "\n")
+                journal.flush()
+                os.fsync(journal.fileno())
+            self._rows.append(row)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+                self._schedule_flush(self.max_delay)
+            # while the database is failing, the timer's backoff paces the retries
+            if len(self._rows) >= self.max_rows and not self._failures:
+                try:
+                    self.flush()
+                except Exception as err:
+                    # the row is journaled and buffered: the timer retries it, so the caller sees no error
+                    logging.error(f"Write-behind flush failed, retrying on the timer: {err}")
+
+    def _schedule_flush(self, delay):
+        self._timer = threading.Timer(delay, self._flush_on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_on_timer(self):
+        with self._lock:
+            self._timer = None
+            try:
+                self.flush()
+            except Exception as err:
+                # rows stay journaled; this timer is the only one that retries
+                delay = min(self.max_delay * 2 ** self._failures, WRITE_BUFFER_MAX_BACKOFF)
+                logging.error(f"Write-behind flush failed, retrying in {delay:.1f} s: {err}")
+                if self._rows and self._timer is None:
+                    self._schedule_flush(delay)
+
+    def flush(self):
+        """Write all buffered rows and truncate the journal. Returns the number of rows written."""
+        with self._lock:
+            if not self._rows:
+                return 0
+            rows = self._rows
+            try:
+                inserted = insert_cheque_details_bulk(rows)
+            except Exception:
+                self._failures += 1
+                raise
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._rows = []
+            self._oldest = None
+            self._failures = 0
+            open(self.journal_path, "w").close()
+            return inserted
+
+    def buffered_keys(self):
+        """cheque_key of every row waiting to be written."""
+        with self._lock:
+            rows = list(self._rows)
+        return {key for key in map(cheque_key, rows) if key is not None}
+
+    def holds(self, details):
+        """True when a cheque with the same natural key is waiting to be written; find_duplicate_cheque() cannot see it yet."""
+        key = cheque_key(details)
+        return key is not None and key in self.buffered_keys()
+
+    def __len__(self):
+        return len(self._rows)
+
+_write_buffer = None
+_write_buffer_lock = threading.Lock()
+
+def get_write_buffer():
+    """Return the process-wide write-behind buffer."""
+    global _write_buffer
+    with _write_buffer_lock:
+        if _write_buffer is None:
+            _write_buffer = WriteBehindBuffer()
+        return _write_buffer
+
+# stream cheque details from Supabase in keyset-paginated chunks
+def iter_cheque_details(columns=None, start_date=None, end_date=None, bank_name=None, status=None,
+                        after=None, page_size=None, as_frame=False):
+    """Yield cheque_details_tbl rows in chunks ordered by (uploaded_at, id).
+
+    columns limits the projection (all columns by default). start_date and
+    end_date bound uploaded_at inclusively by calendar day; bank_name and status
+    filter by equality. after is an (uploaded_at, id) keyset to resume from.
+    Each chunk is a list of dicts, or a DataFrame when as_frame is True.
+    """
+    init_db_connection()
+
+    page_size = max(1, page_size or FETCH_PAGE_SIZE)
+    # the keyset columns must be selected even when the caller did not ask for them
+    if columns:
+        extra_columns = [col for col in ("uploaded_at", "id") if col not in columns]
+        projection = ",".join(list(columns) + extra_columns)
+    else:
+        extra_columns = []
+        projection = "*"
+
+    last_key = after
+    while True:
+        query = supabase.table("cheque_details_tbl").select(projection)
+        if start_date is not None:
+            query = query.gte("uploaded_at", start_date.isoformat())
+        if end_date is not None:
+            query = query.lt("uploaded_at", (end_date + timedelta(days=1)).isoformat())
+        if bank_name is not None:
+            query = query.eq("bank_name", bank_name)
+        if status is not None:
+            query = query.eq("status", status)
+        if last_key is not None:
+            uploaded_at, row_id = last_key
+            query = query.or_(f'uploaded_at.gt."{uploaded_at}",and(uploaded_at.eq."{uploaded_at}",id.gt.{row_id})')
+
+        rows = query.order("uploaded_at").order("id").limit(page_size).execute().data or []
+        if not rows:
+            return
+
+        last_key = (rows[-1]["uploaded_at"], rows[-1]["id"])
+        if extra_columns:
+            rows = [{key: value for key, value in row.items() if key not in extra_columns} for row in rows]
+
+        if as_frame:
+            import pandas as pd
+            yield pd.DataFrame(rows, columns=list(columns) if columns else None)
+        else:
+            yield rows
+
+        if len(rows) < page_size:
+            return
+
 # fetch cheque details from Supabase
 def fetch_cheque_details():
     """Fetch all cheque details from Supabase."""
     try:
-        init_db_connection()
-        response = supabase.table("cheque_details_tbl").select("*").execute()
-        
-        if response.data:
-            return response.data
-        return []
+        records = []
+        for chunk in iter_cheque_details():
+            records.extend(chunk)
+        return records
     except Exception as err:
         logging.error(f"Error fetching cheque details: {err}")
         return []
-    
\ No newline at end of file
+
+# server-side aggregates (see sql/aggregates.sql) with a pure-Python fallback
+AGGREGATES_MODE = os.getenv("AGGREGATES_MODE", "auto")  # auto, rpc, local or mirror
+_rpc_available = AGGREGATES_MODE in ("auto", "rpc")
+
+def _parse_amount(value):
+    """Parse a stored amount string the same way cheque_amount_value() does."""
+    digits = "".join(ch for ch in str(value or "") if ch.isdigit() or ch == ".")
+    try:
+        return float(digits) if digits else None
+    except ValueError:
+        return None
+
+def _aggregate_locally(name, params):
+    """Compute an aggregate by streaming only the needed columns."""
+    if name == "cheque_overview":
+        for_date = params["for_date"]
+        result = {"total_count": 0, "today_count": 0, "failed_count": 0,
+                  "first_upload_date": None, "last_upload_date": None}
+        for chunk in iter_cheque_details(columns=["uploaded_at", "status"]):
+            for row in chunk:
+                upload_date = (row.get("uploaded_at") or "")[:10] or None
+                result["total_count"] += 1
+                result["today_count"] += upload_date == for_date
+                result["failed_count"] += row.get("status") == "Failed"
+                # rows arrive ordered by uploaded_at
+                if upload_date:
+                    result["first_upload_date"] = result["first_upload_date"] or upload_date
+                    result["last_upload_date"] = upload_date
+        return [result]
+
+    if name in ("cheque_daily_counts", "cheque_monthly_counts"):
+        key_name, key_length = ("upload_date", 10) if name == "cheque_daily_counts" else ("upload_month", 7)
+        counts = {}
+        for chunk in iter_cheque_details(columns=["uploaded_at"]):
+            for row in chunk:
+                if row.get("uploaded_at"):
+                    key = row["uploaded_at"][:key_length]
+                    counts[key] = counts.get(key, 0) + 1
+        return [{key_name: key, "count": count} for key, count in sorted(counts.items())]
+
+    if name == "cheque_bank_summary":
+        summary = {}
+        for chunk in iter_cheque_details(columns=["bank_name", "amount"]):
+            for row in chunk:
+                entry = summary.setdefault(row.get("bank_name"), [0, 0.0])
+                entry[0] += 1
+                entry[1] += _parse_amount(row.get("amount")) or 0.0
+        rows = [{"bank_name": bank, "cheque_count": count, "total_amount": total}
+                for bank, (count, total) in summary.items()]
+        return sorted(rows, key=lambda row: row["cheque_count"], reverse=True)
+
+    if name == "cheque_amount_stats":
+        start_date = datetime.strptime(params["start_date"], "%Y-%m-%d").date()
+        end_date = datetime.strptime(params["end_date"], "%Y-%m-%d").date()
+        count, amounts = 0, []
+        for chunk in iter_cheque_details(columns=["amount"], start_date=start_date, end_date=end_date):
+            count += len(chunk)
+            amounts.extend(amount for amount in map(_parse_amount, (row.get("amount") for row in chunk)) if amount is not None)
+        return [{
+            "cheque_count": count,
+            "max_amount": max(amounts) if amounts else None,
+            "min_amount": min(amounts) if amounts else None,
+            "avg_amount": sum(amounts) / len(amounts) if amounts else None,
+        }]
+
+    raise ValueError(f"Unknown aggregate: {name}")
+
+def _rpc_missing(err):
+    # PostgREST cannot find the function, or Postgres reports it undefined
+    text = str(err)
+    return "PGRST202" in text or "42883" in text
+
+def fetch_aggregate(name, **params):
+    """Run an aggregate RPC, falling back to a local computation when sql/aggregates.sql is not installed."""
+    global _rpc_available
+    init_db_connection()
+    if AGGREGATES_MODE == "mirror":
+        from utils.columnar_mirror import get_cheque_mirror
+        return get_cheque_mirror().aggregate(name, params)
+    if _rpc_available:
+        try:
+            return supabase.rpc(name, params).execute().data or []
+        except Exception as err:
+            # other errors (the network, a timeout) are not a reason to scan the table locally from now on
+            if AGGREGATES_MODE == "rpc" or not _rpc_missing(err):
+                raise
+            logging.warning(f"Aggregate RPC {name} unavailable, computing locally: {err}")
+            _rpc_available = False
+    return _aggregate_locally(name, params)
+
+def fetch_overview_counts(for_date):
+    """Total, given-day and failed counts plus the first and last upload dates."""
+    rows = fetch_aggregate("cheque_overview", for_date=for_date.isoformat())
+    return rows[0] if rows else {}
+
+def fetch_daily_counts():
+    """Cheques uploaded per day, as [{"upload_date", "count"}]."""
+    return fetch_aggregate("cheque_daily_counts")
+
+def fetch_monthly_counts():
+    """Cheques uploaded per month, as [{"upload_month", "count"}]."""
+    return fetch_aggregate("cheque_monthly_counts")
+
+def fetch_bank_summary():
+    """Cheque count and total amount per bank."""
+    return fetch_aggregate("cheque_bank_summary")
+
+def fetch_amount_stats(start_date, end_date):
+    """Count and max/min/average amount of cheques uploaded in a date range."""
+    rows = fetch_aggregate("cheque_amount_stats", start_date=start_date.isoformat(), end_date=end_date.isoformat())
+    return rows[0] if rows else {}
+
+# one page of records for paginated tables
+RECORD_SORT_COLUMNS = ["uploaded_at", "cheque_date", "amount", "bank_name", "payee_name", "cheque_number", "account_number", "status"]
+RECORD_SEARCH_COLUMNS = ["payee_name", "bank_name", "cheque_number", "account_number"]
+# column filters as (column, operator, value); ilike patterns use * as the wildcard
+RECORD_FILTER_OPERATORS = ["eq", "neq", "gt", "gte", "lt", "lte", "ilike", "not_ilike"]
+
+def _quote_filter_value(value):
+    """Quote a value for a PostgREST or=() filter, where commas and parentheses are reserved."""
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+# whether the amount_value computed column of sql/aggregates.sql exists; probed on first use
+# unless AGGREGATES_MODE says the functions are (rpc) or are not (local) installed
+_amount_value_available = {"rpc": True, "local": False}.get(AGGREGATES_MODE)
+
+def _amount_value_missing(err):
+    # undefined column
+    text = str(err)
+    return "amount_value" in text or "42703" in text
+
+def _numeric_amount_column():
+    """amount is stored as text; numeric sorts and comparisons go through the amount_value computed column."""
+    global _amount_value_available
+    if _amount_value_available is None:
+        try:
+            supabase.table("cheque_details_tbl").select("amount_value").limit(1).execute()
+            _amount_value_available = True
+        except Exception as err:
+            if not _amount_value_missing(err):
+                raise
+            logging.warning(f"amount_value column unavailable, sorting amounts as text: {err}")
+            _amount_value_available = False
+    return "amount_value" if _amount_value_available else None
+
+# exact totals per search and filters; paging through one result set counts the table once
+RECORD_COUNT_SECONDS = float(os.getenv("RECORD_COUNT_SECONDS", "60"))
+_record_counts = {}
+_record_counts_lock = threading.Lock()
+
+def _forget_record_counts():
+    with _record_counts_lock:
+        _record_counts.clear()
+
+# rows written by this process change the totals at once; other writers within RECORD_COUNT_SECONDS
+on_insert(_forget_record_counts)
+
+def fetch_cheque_page(offset=0, limit=50, sort_by="uploaded_at", descending=True, search=None, columns=None, filters=None):
+    """Fetch one page of cheque_details_tbl and the number of rows matching the search and filters.
+
+    search matches RECORD_SEARCH_COLUMNS case-insensitively. filters is a
+    list of (column, operator, value) with operators from
+    RECORD_FILTER_OPERATORS; all of them must hold. Rows are ordered by
+    sort_by (one of RECORD_SORT_COLUMNS), then id, so pages are stable.
+    amount sorts and compares numerically through the amount_value computed
+    column when sql/aggregates.sql is installed. Returns (rows, total); the
+    total is counted exactly once per search and filters and reused for
+    RECORD_COUNT_SECONDS, or until this process writes rows.
+    """
+    init_db_connection()
+    if sort_by not in RECORD_SORT_COLUMNS:
+        raise ValueError(f"Cannot sort records by {sort_by}.")
+
+    count_key = ((search or "").strip(), tuple(tuple(condition) for condition in filters or []))
+    with _record_counts_lock:
+        counted = _record_counts.get(count_key)
+    if counted is not None and time.monotonic() - counted[1] > RECORD_COUNT_SECONDS:
+        counted = None
+
+    query = supabase.table("cheque_details_tbl").select(",".join(columns) if columns else "*", count=None if counted else "exact")
+    if search and search.strip():
+        pattern = _quote_filter_value(f"*{search.strip()}*")
+        query = query.or_(",".join(f"{col}.ilike.{pattern}" for col in RECORD_SEARCH_COLUMNS))
+
+    for column, operator, value in filters or []:
+        if column not in RECORD_SORT_COLUMNS or operator not in RECORD_FILTER_OPERATORS:
+            raise ValueError(f"Cannot filter records by {column} {operator}.")
+        if column == "amount" and operator not in ("ilike", "not_ilike"):
+            column = _numeric_amount_column()
+            if column is None:
+                raise ValueError("Comparing amounts needs the functions in sql/aggregates.sql.")
+        if operator == "not_ilike":
+            query = query.not_.ilike(column, value)
+        else:
+            query = getattr(query, operator)(column, value)
+
+    order_column = sort_by
+    if sort_by == "amount":
+        order_column = _numeric_amount_column() or "amount"
+    response = query.order(order_column, desc=descending).order("id", desc=descending).range(offset, offset + limit - 1).execute()
+    if counted is not None:
+        return response.data or [], counted[0]
+    total = response.count or 0
+    with _record_counts_lock:
+        _record_counts[count_key] = (total, time.monotonic())
+    return response.data or [], total
@@ -1,11 +1,17 @@
 import streamlit as st
 from dotenv import load_dotenv
 from PIL import Image
-from pdf2image import convert_from_bytes
+import hashlib
 import io
-from apiconfig import extract_cheque_details  
-from dbconnection import insert_cheque_details, init_db_connection
-import os
+import logging
+from apiconfig import extract_cheque_details_batch, EXTRACTION_WORKERS, GEMINI_BATCH_SIZE, REJECTED_ERRORS
+from dbconnection import find_duplicate_cheque, get_write_buffer, init_db_connection
+from utils.duplicate_index import get_duplicate_index
+from utils.job_queue import DeferredPage, SkippedPage, get_job_queue
+from utils.metrics import get_metrics
+from utils.page_filter import classify_page
+from utils.preprocess import encode_for_model, preprocess_image, PREPROCESS_GRAYSCALE
+from utils.rasterize import PdfRasterizer, find_poppler_path
 
 # load environment variables
 load_dotenv()
@@ -44,7 +50,7 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-st.subheader("Upload Cheque Image or PDF")
+st.subheader("Upload Cheque Images or PDFs")
 
 # initialize session state
 if "uploaded_file" not in st.session_state:
@@ -52,88 +58,136 @@ if "uploaded_file" not in st.session_state:
 if "cheque_details" not in st.session_state:
     st.session_state.cheque_details = None
 
-import subprocess
-def check_poppler_path():
-    result = subprocess.run(["which", "pdftoppm"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    poppler_path = result.stdout.strip()
-    if poppler_path:
-        print(f"Poppler is installed at: {poppler_path}")
-    else:
-        print("Poppler is NOT found in PATH.")
-    return poppler_path
-
-POPPLER_PATH = check_poppler_path()
-
-if os.name == "nt":  # windows system
-    poppler_path = r"C:\poppler-24.08.0\Library\bin"
-else:  
-    poppler_path = "/usr/bin"
-
-def process_uploaded_file(uploaded_file):
-    """Process uploaded cheque image or multi-page PDF."""
-    if uploaded_file is not None:
-        if uploaded_file.type.startswith("image/"):
-            # convert single cheque image
-            image = Image.open(uploaded_file).convert("RGB")
-            img_byte_arr = io.BytesIO()
-            image.save(img_byte_arr, format="JPEG")
-            return [{"mime_type": uploaded_file.type, "data": img_byte_arr.getvalue()}]
-
-        elif uploaded_file.type == "application/pdf":
-            # convert PDF pages to images
-            images = convert_from_bytes(uploaded_file.getvalue(), fmt="jpeg", poppler_path=poppler_path)
-            if not images:
-                raise ValueError("Failed to convert PDF to images.")
-
-            processed_images = []
-            for img in images:
-                img_byte_arr = io.BytesIO()
-                img.save(img_byte_arr, format="JPEG")
-                processed_images.append({"mime_type": "image/jpeg", "data": img_byte_arr.getvalue()})
-
-            return processed_images  # return list of processed pages
-
-        else:
-            raise ValueError("Unsupported file type. Please upload JPG, PNG, or PDF.")
+def preprocess_pages(images):
+    """Preprocess decoded pages one at a time as they are consumed."""
+    for img in images:
+        with get_metrics().stage("preprocess"):
+            image, stats = preprocess_image(img)
+        yield {"image": image, "stats": stats}
+
+def prepare_upload_pages(file_type, data, first_page):
+    """Queue preparer: split an uploaded cheque image or multi-page PDF into encoded pages.
+
+    Yields (page_index, image_bytes, skip_reason) from page index first_page
+    on. PDF pages are rendered lazily in small batches as the generator is
+    consumed; blank and non-cheque PDF pages come with a skip reason instead.
+    """
+    if file_type.startswith("image/"):
+        # decode single cheque image
+        images = [] if first_page else [Image.open(io.BytesIO(data))]
+
+    elif file_type == "application/pdf":
+        # render PDF pages on demand (ppm, so poppler does not JPEG-encode them)
+        rasterizer = PdfRasterizer(data, grayscale=PREPROCESS_GRAYSCALE, poppler_path=find_poppler_path(), first_page=first_page + 1)
+        if not len(rasterizer):
+            raise ValueError("Failed to convert PDF to images.")
+        images = get_metrics().timed_iter(rasterizer, "rasterize")
 
     else:
-        raise FileNotFoundError("No file uploaded!")
+        raise ValueError("Unsupported file type. Please upload JPG, PNG, or PDF.")
+
+    bytes_saved = 0
+    for idx, file_content in enumerate(preprocess_pages(images), start=first_page):
+        # blank separators and cover sheets in scanned PDFs never reach the model
+        if file_type == "application/pdf":
+            with get_metrics().stage("classify", page=idx):
+                skip_reason, _ = classify_page(file_content["image"])
+            if skip_reason:
+                get_metrics().incr("pages_skipped")
+                yield idx, None, skip_reason
+                continue
+        with get_metrics().stage("encode", page=idx):
+            payload = encode_for_model(file_content["image"])["data"]
+        bytes_saved += file_content["stats"]["bytes_saved"]
+        yield idx, payload, None
+    logging.info(f"Preprocessing trimmed {max(bytes_saved, 0) / 1e6:.1f} MB of pixel data.")
+
+def extract_page_jobs(jobs):
+    """Queue worker: extract a batch of pages and buffer their rows for a bulk insert."""
+    try:
+        with get_metrics().stage("extract_job", pages=len(jobs)):
+            results = extract_cheque_details_batch([image_bytes for image_bytes, _, _ in jobs], batch_size=GEMINI_BATCH_SIZE)  # Call Gemini API
+    except REJECTED_ERRORS as err:
+        # Gemini was not called: try again once the breaker resets, without using up the pages' attempts
+        get_metrics().incr("pages_deferred", len(jobs))
+        return [DeferredPage(str(err), err.retry_after) for _ in jobs]
+    errors = []
+    for response_data in results:
+        if not isinstance(response_data, dict) or not response_data:
+            get_metrics().incr("pages_failed")
+            errors.append("API response is invalid or empty.")
+            continue
+        get_metrics().incr("pages_extracted")
+        # the index answers "certainly new" without a round-trip; only its hits are checked in the buffer and the database
+        duplicates = get_duplicate_index()
+        if duplicates.might_contain(response_data) and (get_write_buffer().holds(response_data) or find_duplicate_cheque(response_data)):
+            get_metrics().incr("duplicates_skipped")
+            errors.append(SkippedPage("this cheque (bank, account and cheque number) is already stored."))
+            continue
+        duplicates.add(response_data)
+        get_write_buffer().add(response_data)
+        errors.append(None)
+    return errors
+
+# background threads split uploads into pages and drain the durable job queue, independent of this page's reruns
+job_queue = get_job_queue()
+job_queue.start_workers(EXTRACTION_WORKERS, extract_page_jobs, prepare_upload_pages, batch_size=GEMINI_BATCH_SIZE)
 
 # file uploader
-upload_file = st.file_uploader("Upload a Cheque Image or PDF", type=["jpg", "jpeg", "png", "pdf"], label_visibility="collapsed")
+upload_files = st.file_uploader("Upload Cheque Images or PDFs", type=["jpg", "jpeg", "png", "pdf"], accept_multiple_files=True, label_visibility="collapsed")
 
 # process button
-if st.button("Process") and upload_file is not None:
-    with st.spinner("Processing... Please wait ⏳"):
+if st.button("Process") and upload_files:
+    for upload_file in upload_files:
         try:
-            # prevent duplicate processing using file hash
-            file_hash = hash(upload_file.getvalue())
-            if "last_uploaded_file" in st.session_state and st.session_state.last_uploaded_file == file_hash:
-                st.warning("This file has already been processed.")
-                st.stop()
-
-            st.session_state.last_uploaded_file = file_hash  # store hash
-
-            file_contents = process_uploaded_file(upload_file)  # convert PDF/image to bytes
-
-            if not file_contents:
-                st.error("No valid cheque images found in the file.")
-                st.stop()
-
-            # process each page/image separately
-            for idx, file_content in enumerate(file_contents):
-                response_data = extract_cheque_details(file_content["data"])  # Call Gemini API
-
-                # ensure response is valid
-                if not isinstance(response_data, dict) or not response_data:
-                    st.error(f"Page {idx}: API response is invalid or empty.")
-                    continue  # skip to next page
-                insert_cheque_details(response_data)
+            # prevent duplicate processing using a stable file digest
+            file_hash = hashlib.sha256(upload_file.getvalue()).hexdigest()
+            if job_queue.find_upload(file_hash) is not None:
+                st.warning(f"{upload_file.name}: this file has already been processed.")
+                continue
 
-                st.markdown(
-                    f'<div class="custom-success">Page {idx+1}: Cheque details processed successfully! Check the dashboard for details.</div>',
-                    unsafe_allow_html=True
-                )
+            # the preparer renders, preprocesses and encodes the pages in the background
+            job_queue.create_upload(upload_file.name, file_hash, upload_file.type, upload_file.getvalue())
+            get_metrics().incr("upload_bytes", upload_file.size)
+            st.caption(f"{upload_file.name}: queued for processing.")
 
         except Exception as e:
-            st.error(f"Error: {e}")
+            st.error(f"{upload_file.name}: Error: {e}")
+
+@st.fragment(run_every=2)
+def show_queue_status():
+    """Poll the job queue and show per-file progress and throughput."""
+    uploads = job_queue.upload_status()
+    if not uploads:
+        return
+
+    st.subheader("Processing Status")
+    for upload in uploads:
+        if upload["status"] == "failed":
+            st.error(f"{upload['file_name']}: Error: {upload['error']}")
+        if not upload["page_count"]:
+            if upload["status"] in ("queued", "preparing"):
+                st.caption(f"{upload['file_name']}: preparing pages...")
+            continue
+        text = f"{upload['file_name']}: {upload['done']}/{upload['page_count']} pages processed"
+        if upload["failed"]:
+            text += f", {upload['failed']} failed"
+        if upload["skipped"]:
+            text += f", {upload['skipped']} skipped"
+        if upload["status"] in ("queued", "preparing"):
+            text += ", preparing more pages"
+        if upload["pages_per_second"]:
+            text += f" ({upload['pages_per_second']:.2f} pages/s)"
+        st.progress(upload["finished"] / upload["page_count"], text=text)
+
+        if upload["status"] == "complete" and upload["finished"] == upload["page_count"] and upload["done"]:
+            st.markdown(
+                f'<div class="custom-success">{upload["file_name"]}: {upload["done"]} cheque(s) processed successfully! Check the dashboard for details.</div>',
+                unsafe_allow_html=True
+            )
+        for page_index, error in upload["errors"]:
+            st.error(f"{upload['file_name']}, page {page_index+1}: {error}")
+        for page_index, reason in upload["skipped_pages"]:
+            st.info(f"{upload['file_name']}, page {page_index+1}: skipped, {reason}")
+
+show_queue_status()
@@ -1,45 +1,136 @@
 import streamlit as st
 import pandas as pd
-from st_aggrid import AgGrid, GridOptionsBuilder
-from dbconnection import fetch_cheque_details, init_db_connection
+from dbconnection import (
+    init_db_connection, fetch_overview_counts, fetch_daily_counts, fetch_monthly_counts,
+    fetch_bank_summary, fetch_amount_stats, fetch_cheque_page,
+)
+from utils.chart_data import monthly_series, time_series, top_categories
+from utils.grid_source import FILTER_OPTIONS, GRID_COLUMNS, fetch_grid_block, grid_query
+from utils.schema import to_display_frame, to_typed_frame
 from datetime import datetime
 import streamlit_shadcn_ui as ui
-import altair as alt
-import plotly.graph_objects as go 
 
 
 # initialize Supabase DB 
 init_db_connection()
 
 
-records = fetch_cheque_details()
-if records:
-    expected_columns = ["cheque_date", "account_number", "bank_name", "cheque_number", "payee_name", "amount", "uploaded_at"]
-    if len(records[0]) == 8:
-        expected_columns.append("status")
-    df = pd.DataFrame(records, columns=expected_columns)
-else:
-    df = pd.DataFrame()  
-
-
-if df.empty:
+# paginated records table: only the visible page is fetched and sent to the browser
+RECORD_COLUMNS = {"cheque_date": "Cheque Date", "cheque_number": "Cheque No", "payee_name": "Payee Name",
+                  "account_number": "Account Number", "bank_name": "Bank Name", "amount": "Amount"}
+SORT_OPTIONS = {"uploaded_at": "Upload Time", "cheque_date": "Cheque Date", "amount": "Amount",
+                "bank_name": "Bank Name", "payee_name": "Payee Name", "cheque_number": "Cheque No"}
+PAGE_SIZES = [25, 50, 100]
+
+def reset_records_page():
+    st.session_state["records_page"] = 1
+
+def show_records_page():
+    """Search, sort and page through cheque records one page at a time."""
+    controls = st.columns([3, 2, 1, 1])
+    search = controls[0].text_input("Search", placeholder="Payee, bank, cheque or account number", key="records_search", on_change=reset_records_page)
+    sort_by = controls[1].selectbox("Sort by", list(SORT_OPTIONS), format_func=SORT_OPTIONS.get, key="records_sort", on_change=reset_records_page)
+    descending = controls[2].selectbox("Order", ["Descending", "Ascending"], key="records_order", on_change=reset_records_page) == "Descending"
+    page_size = controls[3].selectbox("Rows", PAGE_SIZES, index=1, key="records_page_size", on_change=reset_records_page)
+
+    page = st.session_state.get("records_page", 1)
+    rows, total = fetch_cheque_page((page - 1) * page_size, page_size, sort_by, descending, search)
+    page_count = max(1, -(-total // page_size))
+    if page > page_count:
+        # the search narrowed or rows were removed since the page was chosen
+        page = st.session_state["records_page"] = page_count
+        rows, total = fetch_cheque_page((page - 1) * page_size, page_size, sort_by, descending, search)
+
+    if not rows:
+        st.info("No cheque records match your search.")
+        return
+    records = to_display_frame(to_typed_frame(rows), list(RECORD_COLUMNS)).rename(columns=RECORD_COLUMNS)
+    st.dataframe(records, hide_index=True, use_container_width=True, height=min(len(records), 20) * 35 + 38)
+
+    pager = st.columns([1, 3])
+    pager[0].number_input("Page", min_value=1, max_value=page_count, step=1, key="records_page")
+    pager[1].caption(f"Page {page} of {page_count} · {total:,} matching records")
+
+
+# records grid: its sort and filter state is applied in the database and only one block of rows is sent
+GRID_BLOCK_SIZES = [100, 250, 500]
+# the grid re-applies its filters to the block it holds; dates arrive as "YYYY-MM-DD..." strings
+DATE_FILTER_COMPARATOR = """
+function(filterDate, cellValue) {
+    if (!cellValue) { return -1; }
+    const parts = cellValue.substring(0, 10).split("-");
+    const cellDate = new Date(Number(parts[0]), Number(parts[1]) - 1, Number(parts[2]));
+    return cellDate < filterDate ? -1 : cellDate > filterDate ? 1 : 0;
+}
+"""
+
+def reset_grid_page():
+    st.session_state["grid_page"] = 1
+
+def show_records_grid():
+    """AgGrid over one block of records; sorting and filtering in the grid re-query the database."""
+    from st_aggrid import AgGrid, GridOptionsBuilder, JsCode
+
+    # the grid reports its sort and filter state through its widget value
+    grid_value = st.session_state.get("records_grid")
+    grid_state = grid_value.get("gridState") if isinstance(grid_value, dict) else None
+    try:
+        query = grid_query(grid_state)
+    except ValueError as err:
+        st.warning(f"{err} Showing records without column filters.")
+        query = grid_query({"sort": (grid_state or {}).get("sort")})
+    if st.session_state.get("grid_query") != query:
+        st.session_state["grid_query"] = query
+        st.session_state["grid_page"] = 1
+
+    page_size = st.selectbox("Rows per page", GRID_BLOCK_SIZES, key="grid_page_size", on_change=reset_grid_page)
+    page = st.session_state.get("grid_page", 1)
+    try:
+        block, total = fetch_grid_block(query, page, page_size)
+    except ValueError as err:
+        st.warning(f"{err} Showing records without column filters.")
+        query = dict(query, filters=[])
+        block, total = fetch_grid_block(query, page, page_size)
+    page_count = max(1, -(-total // page_size))
+    if page > page_count:
+        page = st.session_state["grid_page"] = page_count
+        block, total = fetch_grid_block(query, page, page_size)
+
+    gb = GridOptionsBuilder.from_dataframe(block)
+    gb.configure_side_bar()
+    gb.configure_default_column(editable=True)
+    for column, kind in GRID_COLUMNS.items():
+        filter_params = {"filterOptions": FILTER_OPTIONS[kind], "maxNumConditions": 1}
+        if kind == "date":
+            filter_params["comparator"] = JsCode(DATE_FILTER_COMPARATOR)
+        gb.configure_column(column, filter=f"ag{kind.title()}ColumnFilter", filterParams=filter_params)
+    AgGrid(block, gridOptions=gb.build(), key="records_grid", update_on=["filterChanged", "sortChanged"],
+           allow_unsafe_jscode=True, fit_columns_on_grid_load=True)
+
+    pager = st.columns([1, 3])
+    pager[0].number_input("Page", min_value=1, max_value=page_count, step=1, key="grid_page")
+    pager[1].caption(f"Page {page} of {page_count} · {total:,} matching records")
+
+
+# small aggregated result sets computed by the database
+today = datetime.today().date()
+overview = fetch_overview_counts(today)
+
+if not overview.get("total_count"):
     st.warning("No cheque data available.")
 else:
-    #df["cheque_date"] = pd.to_datetime(df["cheque_date"], errors='coerce', dayfirst=True)
-    df["cheque_date"] = pd.to_datetime(df["cheque_date"], errors="coerce").dt.strftime("%Y-%m-%d")
-    df["uploaded_at"] = pd.to_datetime(df["uploaded_at"], errors='coerce')
-    df["upload_date"] = df["uploaded_at"].dt.strftime("%Y-%m-%d")  
-
-    total_cheques = len(df)
-    today = datetime.today().date()
-    today_count = len(df[df["upload_date"] == str(today)]) if "upload_date" in df.columns else 0
-    failed_count = len(df[df["status"] == "Failed"]) if "status" in df.columns else 0
+    total_cheques = overview["total_count"]
+    today_count = overview["today_count"]
+    failed_count = overview["failed_count"]
 
     # Dashboard UI
     st.subheader("Dashboard")
     selected_tab = ui.tabs(options=['Overview', 'Analytics', 'Reports', 'Tables'], default_value='Overview', key="main_tabs")
 
+    # chart libraries are imported by the tabs that draw with them
     if selected_tab == 'Overview':
+        import altair as alt
+
         cols = st.columns(3)
         with cols[0]:
             ui.card(title="Total Cheques Processed", content=str(total_cheques), key="card1").render()
@@ -53,21 +144,19 @@ else:
 
         with chart_cols[0]:  
             st.subheader("Cheques Processed Over Time")
-            df["upload_date"] = pd.to_datetime(df["uploaded_at"], errors="coerce").dt.date  
-
-            df["upload_date"] = pd.to_datetime(df["upload_date"])
+            # bounded number of points however long the history is
+            upload_counts, bucket = time_series(fetch_daily_counts(), "upload_date")
 
-            upload_counts = df.groupby("upload_date").size().reset_index(name="count")
             line_chart = alt.Chart(upload_counts).mark_line(point=True).encode(
-                x=alt.X("upload_date:T", title="Upload Date"),
+                x=alt.X("period:T", title=f"Upload Date (per {bucket})"),
                 y=alt.Y("count:Q", title="Total Cheques Processed"),
-                tooltip=["upload_date:T", "count"]
+                tooltip=[alt.Tooltip("period:T", title=bucket.title()), "count"]
             ).properties(width=500, height=400)
             st.altair_chart(line_chart, use_container_width=True)
 
         with chart_cols[1]:  
             st.subheader("Cheques by Bank")
-            bank_counts = df["bank_name"].value_counts().reset_index()
+            bank_counts = top_categories(pd.DataFrame(fetch_bank_summary(), columns=["bank_name", "cheque_count"]), "bank_name", "cheque_count")
             bank_counts.columns = ["Bank", "Count"]
             bar_chart = alt.Chart(bank_counts).mark_bar().encode(
                 x=alt.X("Bank:N", title="Bank"),
@@ -78,48 +167,35 @@ else:
         
 
         st.subheader("Cheque Records")
-        overview_data = df[["cheque_date", "cheque_number", "payee_name", "account_number", "bank_name", "amount"]]
-        overview_data.columns = ["Cheque Date", "Cheque No", "Payee Name", "Account Number", "Bank Name", "Amount"]
-
-        fig = go.Figure(data=[go.Table(
-            header=dict(values=list(overview_data.columns), fill_color="#0cc789", font=dict(color="#000000", size=14), align="left"),
-            cells=dict(values=[overview_data[col] for col in overview_data.columns], fill_color="white", align="left", font=dict(color="black", size=13))
-        )])
-        st.plotly_chart(fig, use_container_width=True, height=900)
+        show_records_page()
                 
 
     elif selected_tab == 'Analytics':        
-        st.subheader("Cheque Amount Distribution by Bank")
+        import altair as alt
 
-        df["uploaded_at"] = pd.to_datetime(df["uploaded_at"], errors="coerce")
-        df["upload_date"] = df["uploaded_at"].dt.date 
+        st.subheader("Cheque Amount Distribution by Bank")
+        bank_summary = top_categories(pd.DataFrame(fetch_bank_summary(), columns=["bank_name", "cheque_count", "total_amount"]), "bank_name", "total_amount")
 
-        pie_chart = alt.Chart(df).mark_arc().encode(
-            theta=alt.Theta("amount:Q", title="Total Amount"),
+        pie_chart = alt.Chart(bank_summary).mark_arc().encode(
+            theta=alt.Theta("total_amount:Q", title="Total Amount"),
             color=alt.Color("bank_name:N", scale=alt.Scale(scheme="category20"), legend=alt.Legend(title="Bank")),
-            tooltip=["bank_name", "amount"]
+            tooltip=["bank_name", "total_amount"]
         ).properties(width=400, height=300)
         st.altair_chart(pie_chart, use_container_width=True)
 
         st.subheader("Cheque Processing Trend by Day")  
-        df["uploaded_at"] = pd.to_datetime(df["uploaded_at"], errors="coerce")
-
-        # drop rows where `upload_date` is missing
-        df = df.dropna(subset=["upload_date"])
-        # proceed with Altair charts safely
-        upload_counts = df.groupby("upload_date").size().reset_index(name="count")
+        upload_counts, bucket = time_series(fetch_daily_counts(), "upload_date")
 
         daily_chart = alt.Chart(upload_counts).mark_line(point=True).encode(
-            x=alt.X("upload_date:T", title="Cheque Upload Date"),
+            x=alt.X("period:T", title=f"Cheque Upload Date (per {bucket})"),
             y=alt.Y("count:Q", title="Total Cheques Processed"),
-            tooltip=["upload_date:T", "count"]
+            tooltip=[alt.Tooltip("period:T", title=bucket.title()), "count"]
         ).properties(width=600, height=400)
 
         st.altair_chart(daily_chart, use_container_width=True) 
 
         st.subheader("Cheque Processing Trend by Month")
-        df["upload_month"] = df["uploaded_at"].dt.strftime('%Y-%m')  
-        monthly_counts = df.groupby("upload_month").size().reset_index(name="count")
+        monthly_counts = monthly_series(fetch_monthly_counts(), "upload_month")
 
         heatmap = alt.Chart(monthly_counts).mark_rect().encode(
             x="upload_month:N", y="count:Q", color="count:Q", tooltip=["upload_month", "count"]
@@ -129,13 +205,13 @@ else:
 
     elif selected_tab == 'Reports':
         st.subheader("Report & Insight")
-        df["upload_date"] = pd.to_datetime(df["upload_date"], errors="coerce").dt.date  
 
         # handle Date Range Selection
-        min_date, max_date = df["upload_date"].min(), df["upload_date"].max()
+        min_date = pd.to_datetime(overview.get("first_upload_date")).date() if overview.get("first_upload_date") else None
+        max_date = pd.to_datetime(overview.get("last_upload_date")).date() if overview.get("last_upload_date") else None
         date_range = st.date_input("Select Date Range", [min_date, max_date] if min_date and max_date else [today, today])
 
-        if isinstance(date_range, list) and len(date_range) == 2:
+        if isinstance(date_range, (list, tuple)) and len(date_range) == 2:
             start_date, end_date = date_range
         else:
             start_date = date_range[0]
@@ -145,12 +221,12 @@ else:
         elif start_date > end_date:
             st.error("Start date cannot be after end date. Please select a valid range.")
         else:
-            filtered_df = df[(df["upload_date"] >= start_date) & (df["upload_date"] <= end_date)]
+            amount_stats = fetch_amount_stats(start_date, end_date)
             
-            if not filtered_df.empty:
-                highest_cheque = filtered_df["amount"].max()
-                lowest_cheque = filtered_df["amount"].min()
-                avg_cheque = filtered_df["amount"].mean()
+            if amount_stats.get("cheque_count") and amount_stats.get("max_amount") is not None:
+                highest_cheque = float(amount_stats["max_amount"])
+                lowest_cheque = float(amount_stats["min_amount"])
+                avg_cheque = float(amount_stats["avg_amount"])
 
                 metric_cols = st.columns(3)
                 with metric_cols[0]:
@@ -164,23 +240,13 @@ else:
 
 
     elif selected_tab == 'Tables':
-        st.subheader("Cheque Records Table")
-        supabase_columns = ["cheque_date", "account_number", "bank_name", "cheque_number", 
-                        "payee_name", "amount", "uploaded_at", "status"]
-
-        # filter DataFrame to Include Only These Columns
-        cheque_data_filtered = df[supabase_columns] if all(col in df.columns for col in supabase_columns) else df
+        import plotly.graph_objects as go
 
-        # configure Ag-Grid Table
-        gb = GridOptionsBuilder.from_dataframe(cheque_data_filtered)
-        gb.configure_pagination(enabled=True)
-        gb.configure_side_bar()
-        gb.configure_default_column(editable=True, groupable=True)
-        grid_options = gb.build()
-        AgGrid(cheque_data_filtered, gridOptions=grid_options, fit_columns_on_grid_load=True)
+        st.subheader("Cheque Records Table")
+        show_records_grid()
 
         st.subheader("Cheque Records Summary")
-        summary_data = df.groupby("bank_name").agg({"cheque_number": "count", "amount": "sum"}).reset_index()
+        summary_data = pd.DataFrame(fetch_bank_summary(), columns=["bank_name", "cheque_count", "total_amount"])
         summary_data.columns = ["Bank Name", "Total Cheques", "Total Amount"]
 
         fig_summary = go.Figure(data=[go.Table(
@@ -188,4 +254,4 @@ else:
             cells=dict(values=[summary_data[col] for col in summary_data.columns], fill_color="white", align="left")
         )])
 
-        st.plotly_chart(fig_summary, use_container_width=True, height=800) 
+        st.plotly_chart(fig_summary, use_container_width=True, height=800)
@@ -0,0 +1,115 @@
+import streamlit as st
+import pandas as pd
+from apiconfig import gemini_caller, usage_stats
+from dbconnection import AGGREGATES_MODE
+from utils.clients import get_client_manager
+from utils.dataset_cache import get_cheque_dataset
+from utils.duplicate_index import get_duplicate_index
+from utils.metrics import get_metrics, METRICS_FILE, METRICS_PORT
+from utils.page_filter import estimated_seconds_saved, PAGE_FILTER_MODE
+
+st.subheader("Operations")
+st.caption("Latency of each processing stage in this server process, over its most recent samples.")
+
+metrics = get_metrics()
+
+# pipeline stages, in the order a page moves through them
+STAGE_ORDER = ["rasterize", "preprocess", "classify", "encode", "gemini", "parse", "insert", "extract_job"]
+
+@st.fragment(run_every=5)
+def show_metrics():
+    """Refresh the stage percentiles and counters while the page is open."""
+    rows = metrics.summary()
+    if not rows:
+        st.info("No pages have been processed since the server started.")
+    else:
+        stages = pd.DataFrame(rows)
+        stages["order"] = stages["stage"].map({stage: i for i, stage in enumerate(STAGE_ORDER)}).fillna(len(STAGE_ORDER))
+        stages = stages.sort_values(["order", "stage"]).drop(columns="order")
+        stages["share"] = stages["mean_ms"] * stages["count"] / (stages["mean_ms"] * stages["count"]).sum()
+
+        st.markdown("#### Stage latency (ms)")
+        st.dataframe(
+            stages[["stage", "count", "errors", "p50_ms", "p95_ms", "p99_ms", "mean_ms", "max_ms", "share"]],
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "p50_ms": st.column_config.NumberColumn("p50", format="%.1f"),
+                "p95_ms": st.column_config.NumberColumn("p95", format="%.1f"),
+                "p99_ms": st.column_config.NumberColumn("p99", format="%.1f"),
+                "mean_ms": st.column_config.NumberColumn("mean", format="%.1f"),
+                "max_ms": st.column_config.NumberColumn("max", format="%.1f"),
+                "share": st.column_config.ProgressColumn("share of time", min_value=0.0, max_value=1.0, format="%.2f"),
+            },
+        )
+
+    counters = metrics.counters()
+    cols = st.columns(5)
+    cols[0].metric("Uploaded", f"{counters.get('upload_bytes', 0) / 1e6:.1f} MB")
+    cols[1].metric("Sent to Gemini", f"{counters.get('payload_bytes', 0) / 1e6:.1f} MB")
+    cols[2].metric("Pages extracted", counters.get("pages_extracted", 0))
+    cols[3].metric("Pages failed", counters.get("pages_failed", 0))
+    cols[4].metric("Rows inserted", counters.get("rows_inserted", 0))
+
+    st.markdown("#### Page filter")
+    saved = estimated_seconds_saved(metrics)
+    cols = st.columns(5)
+    cols[0].metric("Mode", PAGE_FILTER_MODE)
+    cols[1].metric("Pages skipped", counters.get("pages_skipped", 0))
+    cols[2].metric("Gemini time saved (est.)", f"{saved:.1f} s" if saved is not None else "n/a")
+
+    st.markdown("#### Duplicate cheques")
+    index = get_duplicate_index().stats()
+    cols = st.columns(5)
+    cols[0].metric("Skipped before insert", counters.get("duplicates_skipped", 0))
+    cols[1].metric("Ignored by upsert", counters.get("duplicates_ignored", 0))
+    cols[2].metric("Keys indexed", f"{index['keys']:,}")
+    cols[3].metric("Index size", f"{index['bytes'] / 1e6:.2f} MB")
+    cols[4].metric("False-positive rate", f"{index['error_rate']:.2%}")
+
+    st.markdown("#### Gemini client")
+    caller = gemini_caller.stats()
+    cols = st.columns(5)
+    cols[0].metric("Requests", usage_stats["requests"])
+    cols[1].metric("Retries", caller["retries"])
+    cols[2].metric("Throttled", f"{caller['throttled_seconds']:.1f} s")
+    cols[3].metric("Backoff", f"{caller['backoff_seconds']:.1f} s")
+    cols[4].metric("Circuit", caller["circuit_state"])
+
+show_metrics()
+
+st.markdown("#### Shared dataset")
+dataset = get_cheque_dataset().stats()
+cols = st.columns(4)
+cols[0].metric("Rows", f"{dataset['rows']:,}")
+cols[1].metric("Typed frame", f"{dataset['bytes'] / 1e6:.1f} MB")
+cols[2].metric("As fetched", f"{dataset['raw_bytes'] / 1e6:.1f} MB")
+cols[3].metric("Cache hit rate", f"{dataset['hit_rate']:.0%}")
+
+if AGGREGATES_MODE == "mirror":
+    from utils.columnar_mirror import get_cheque_mirror
+
+    st.markdown("#### Parquet mirror")
+    mirror = get_cheque_mirror().stats()
+    cols = st.columns(4)
+    cols[0].metric("Rows", f"{mirror['rows']:,}")
+    cols[1].metric("Months", mirror["months"])
+    cols[2].metric("Files", mirror["files"])
+    cols[3].metric("On disk", f"{mirror['bytes'] / 1e6:.1f} MB")
+
+st.markdown("#### Connections")
+clients = get_client_manager()
+counters = metrics.counters()
+cols = st.columns(4)
+cols[0].metric("HTTP requests", counters.get("http_requests", 0))
+cols[1].metric("Connections opened", counters.get("http_connections_opened", 0))
+cols[2].metric("TLS handshakes", counters.get("tls_handshakes", 0))
+cols[3].metric("Reconnects", sum(row["reconnects"] for row in clients.stats()))
+if st.button("Check connections"):
+    clients.check_all()
+st.dataframe(pd.DataFrame(clients.stats()), hide_index=True, use_container_width=True)
+
+with st.expander("Prometheus metrics"):
+    endpoint = f" and served on port {METRICS_PORT} at /metrics" if METRICS_PORT else ""
+    st.caption(f"Written to {METRICS_FILE}{endpoint}.")
+    st.code(metrics.render_prometheus(), language="text")
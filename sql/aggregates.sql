@@ -0,0 +1,95 @@
+-- Aggregation functions used by the Dashboard (dbconnection.fetch_* helpers).
+-- Run once in the Supabase SQL editor; the app falls back to computing the
+-- same results in Python when these functions are missing.
+
+-- amount is stored as text; keep digits and the decimal point only, and read
+-- what is left as null unless it is one number (e.g. not "1.50.000.00"), like
+-- dbconnection._parse_amount: the function never raises, so neither do the
+-- aggregates nor inserts maintaining the index on it
+create or replace function cheque_amount_value(amount text)
+returns numeric
+language sql immutable
+as $$
+    select case when digits ~ '^([0-9]+\.?[0-9]*|\.[0-9]+)$' then digits::numeric end
+    from (select regexp_replace(coalesce(amount, ''), '[^0-9.]', '', 'g') as digits) stripped
+$$;
+
+create or replace function cheque_overview(for_date date)
+returns table (total_count bigint, today_count bigint, failed_count bigint,
+               first_upload_date date, last_upload_date date)
+language sql stable
+as $$
+    select count(*),
+           count(*) filter (where uploaded_at::date = for_date),
+           count(*) filter (where status = 'Failed'),
+           min(uploaded_at)::date,
+           max(uploaded_at)::date
+    from cheque_details_tbl
+$$;
+
+create or replace function cheque_daily_counts()
+returns table (upload_date date, count bigint)
+language sql stable
+as $$
+    select uploaded_at::date, count(*)
+    from cheque_details_tbl
+    where uploaded_at is not null
+    group by 1
+    order by 1
+$$;
+
+create or replace function cheque_monthly_counts()
+returns table (upload_month text, count bigint)
+language sql stable
+as $$
+    select to_char(uploaded_at, 'YYYY-MM'), count(*)
+    from cheque_details_tbl
+    where uploaded_at is not null
+    group by 1
+    order by 1
+$$;
+
+create or replace function cheque_bank_summary()
+returns table (bank_name text, cheque_count bigint, total_amount numeric)
+language sql stable
+as $$
+    select bank_name, count(*), coalesce(sum(cheque_amount_value(amount)), 0)
+    from cheque_details_tbl
+    group by 1
+    order by 2 desc
+$$;
+
+create or replace function cheque_amount_stats(start_date date, end_date date)
+returns table (cheque_count bigint, max_amount numeric, min_amount numeric, avg_amount numeric)
+language sql stable
+as $$
+    select count(*),
+           max(cheque_amount_value(amount)),
+           min(cheque_amount_value(amount)),
+           avg(cheque_amount_value(amount))
+    from cheque_details_tbl
+    where uploaded_at >= start_date and uploaded_at < end_date + 1
+$$;
+
+create index if not exists idx_cheque_details_uploaded_at on cheque_details_tbl (uploaded_at, id);
+
+-- paginated records table (dbconnection.fetch_cheque_page)
+-- computed column: PostgREST exposes it as cheque_details_tbl.amount_value, so
+-- the table can sort amounts numerically
+create or replace function amount_value(cheque_details_tbl)
+returns numeric
+language sql immutable
+as $$
+    select cheque_amount_value($1.amount)
+$$;
+
+create index if not exists idx_cheque_details_cheque_date on cheque_details_tbl (cheque_date, id);
+-- every insert and update evaluates cheque_amount_value for this index, so it
+-- relies on the function returning null for unparseable amounts; on a database
+-- where an earlier version of this script failed here, run it again
+create index if not exists idx_cheque_details_amount_value on cheque_details_tbl (cheque_amount_value(amount), id);
+
+-- substring search over payee, bank, cheque and account numbers
+create extension if not exists pg_trgm;
+create index if not exists idx_cheque_details_search on cheque_details_tbl
+    using gin (payee_name gin_trgm_ops, bank_name gin_trgm_ops, cheque_number gin_trgm_ops, account_number gin_trgm_ops);
@@ -0,0 +1,31 @@
+-- Natural key for duplicate detection (dbconnection.cheque_key and the upsert path).
+-- Run once in the Supabase SQL editor after sql/aggregates.sql; without it the app
+-- inserts rows as before and only flags duplicates in-process.
+
+-- bank, account number and cheque number, normalized the same way as
+-- dbconnection.cheque_key(); null when any part is missing, so partial
+-- extractions never collide
+create or replace function cheque_natural_key(bank_name text, account_number text, cheque_number text)
+returns text
+language sql immutable
+as $$
+    select case
+        when nullif(btrim(coalesce(bank_name, '')), '') is null
+          or nullif(regexp_replace(coalesce(account_number, ''), '[\s-]', '', 'g'), '') is null
+          or nullif(regexp_replace(coalesce(cheque_number, ''), '[\s-]', '', 'g'), '') is null
+        then null
+        else regexp_replace(lower(btrim(bank_name)), '\s+', ' ', 'g')
+            || '|' || regexp_replace(account_number, '[\s-]', '', 'g')
+            || '|' || regexp_replace(cheque_number, '[\s-]', '', 'g')
+    end
+$$;
+
+alter table cheque_details_tbl add column if not exists cheque_key text
+    generated always as (cheque_natural_key(bank_name, account_number, cheque_number)) stored;
+
+-- existing duplicates must be resolved before the unique index can be built;
+-- this lists them, keeping the first upload of each cheque:
+--   select cheque_key, array_agg(id order by uploaded_at, id) as ids
+--   from cheque_details_tbl where cheque_key is not null
+--   group by cheque_key having count(*) > 1;
+create unique index if not exists idx_cheque_details_cheque_key on cheque_details_tbl (cheque_key);
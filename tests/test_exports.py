@@ -0,0 +1,42 @@
+import io
+
+from docx import Document
+
+from utils.exports import convert_df_to_docx, readable_frame
+from utils.pdf_table import render_pdf_table
+from utils.schema import to_typed_frame
+
+ROWS = [
+    {"id": 1, "cheque_date": "2024-05-02", "account_number": "001234", "bank_name": None, "cheque_number": "000451",
+     "payee_name": "Asha Rao", "amount": "1,250.50", "uploaded_at": "2024-05-03T10:00:00+00:00", "status": None},
+    {"id": 2, "cheque_date": None, "account_number": "009876", "bank_name": "State Bank", "cheque_number": "000452",
+     "payee_name": "nan", "amount": None, "uploaded_at": None, "status": "Processed"},
+]
+
+
+def test_display_frame_blanks_missing_categories():
+    frame = readable_frame(to_typed_frame(ROWS))
+    assert frame.loc[0, "Bank Name"] == ""
+    assert frame.loc[0, "Status"] == ""
+    assert frame.loc[1, "Bank Name"] == "State Bank"
+    # a stored "nan" is a value, not a missing one
+    assert frame.loc[1, "Payee Name"] == "nan"
+    assert frame.loc[1, "Amount"] == ""
+
+
+def test_pdf_export_has_no_nan_cells():
+    frame = readable_frame(to_typed_frame(ROWS)).drop(columns=["Payee Name"])
+    pdf = render_pdf_table(frame, compress=False)
+    pdf = pdf if isinstance(pdf, bytes) else pdf.getvalue()
+    # cell text is written as PDF string operands, "(State Bank)"
+    assert b"(State Bank)" in pdf
+    assert b"(nan)" not in pdf
+
+
+def test_docx_export_has_no_nan_cells():
+    frame = readable_frame(to_typed_frame(ROWS)).drop(columns=["Payee Name"])
+    data = convert_df_to_docx(frame)
+    data = data if isinstance(data, bytes) else data.getvalue()
+    cells = [cell.text for table in Document(io.BytesIO(data)).tables for row in table.rows for cell in row.cells]
+    assert "State Bank" in cells
+    assert "nan" not in cells
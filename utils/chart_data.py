@@ -0,0 +1,96 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# chart size limits: points per time series and slices per categorical chart
+CHART_MAX_POINTS = int(os.getenv("CHART_MAX_POINTS", "180"))
+CHART_MAX_CATEGORIES = int(os.getenv("CHART_MAX_CATEGORIES", "12"))
+# "buckets" sums into day/week/month buckets; "lttb" keeps the shape of the daily line
+CHART_DOWNSAMPLE = os.getenv("CHART_DOWNSAMPLE", "buckets")
+
+# bucket sizes tried in order, with the label used in axis titles
+BUCKETS = [("D", "day"), ("W-MON", "week"), ("MS", "month"), ("QS", "quarter"), ("YS", "year")]
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets: indices of threshold points that keep the line's shape.
+
+    x must be increasing. The first and last points are always kept.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    every = (n - 2) / (threshold - 2)
+    selected = np.empty(threshold, dtype="int64")
+    selected[0] = 0
+    a = 0
+    for i in range(threshold - 2):
+        # average of the next bucket is the third corner of the triangle
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    selected[-1] = n - 1
+    return selected
+
+
+def time_series(rows, date_key, max_points=None, method=None):
+    """Daily counts as a bounded series for a line chart.
+
+    rows are [{date_key: "YYYY-MM-DD", "count": n}] as returned by
+    fetch_daily_counts(). Days without uploads count as zero. Returns a
+    frame with period (datetime) and count columns, and the bucket label
+    ("day", "week", ...) describing what one point stands for.
+    """
+    max_points = max_points or CHART_MAX_POINTS
+    method = method or CHART_DOWNSAMPLE
+    counts = pd.DataFrame(rows, columns=[date_key, "count"])
+    if counts.empty:
+        return pd.DataFrame({"period": pd.to_datetime([]), "count": []}), "day"
+
+    daily = counts.set_index(pd.to_datetime(counts[date_key]))["count"].astype("int64").resample("D").sum()
+
+    if method == "lttb" and len(daily) > max_points:
+        keep = lttb(daily.index.asi8, daily.to_numpy(), max_points)
+        series = daily.iloc[keep]
+        return pd.DataFrame({"period": series.index, "count": series.to_numpy()}), "day"
+
+    for freq, label in BUCKETS:
+        series = daily if freq == "D" else daily.resample(freq, label="left", closed="left").sum()
+        if len(series) <= max_points:
+            break
+    return pd.DataFrame({"period": series.index, "count": series.to_numpy()}), label
+
+
+def monthly_series(rows, month_key, max_points=None):
+    """Monthly counts as a bounded series: the most recent max_points months, zero-filled."""
+    max_points = max_points or CHART_MAX_POINTS
+    counts = pd.DataFrame(rows, columns=[month_key, "count"])
+    if counts.empty:
+        return counts
+    monthly = counts.set_index(pd.PeriodIndex(counts[month_key], freq="M"))["count"].astype("int64")
+    monthly = monthly.reindex(pd.period_range(monthly.index.min(), monthly.index.max(), freq="M"), fill_value=0)
+    monthly = monthly.iloc[-max_points:]
+    return pd.DataFrame({month_key: monthly.index.astype(str), "count": monthly.to_numpy()})
+
+
+def top_categories(frame, category, value, max_categories=None, other_label="Other"):
+    """Keep the max_categories - 1 largest categories by value and fold the rest into one row."""
+    max_categories = max_categories or CHART_MAX_CATEGORIES
+    frame = frame.sort_values(value, ascending=False)
+    if len(frame) <= max_categories:
+        return frame.reset_index(drop=True)
+    head = frame.iloc[:max_categories - 1]
+    rest = frame.iloc[max_categories - 1:].select_dtypes("number")
+    other = pd.DataFrame([{category: other_label, **{col: rest[col].sum() for col in rest.columns}}])
+    return pd.concat([head, other], ignore_index=True)
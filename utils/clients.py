@@ -0,0 +1,234 @@
+import importlib.util
+import logging
+import os
+import threading
+import time
+
+from utils.metrics import get_metrics
+
+# one keep-alive connection pool (HTTP/2 when h2 is installed) shared by the Supabase PostgREST, storage and auth clients
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+# connections beyond this many are closed after each request, so it defaults to the whole pool
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", str(HTTP_MAX_CONNECTIONS)))
+# idle pooled connections are kept this long (httpx closes them after 5 s by default)
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "30"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+# seconds between keepalive pings on the Gemini gRPC channel
+GEMINI_KEEPALIVE_SECONDS = float(os.getenv("GEMINI_KEEPALIVE_SECONDS", "60"))
+# seconds between health checks of a client, and how long a check may take; a failed check rebuilds the client
+CLIENT_HEALTH_INTERVAL = float(os.getenv("CLIENT_HEALTH_INTERVAL", "60"))
+CLIENT_HEALTH_TIMEOUT = float(os.getenv("CLIENT_HEALTH_TIMEOUT", "5"))
+
+
+def _trace_connections(event_name, info):
+    # httpcore trace hook: counts the connections and TLS handshakes the pool had to open
+    if event_name == "connection.connect_tcp.complete":
+        get_metrics().incr("http_connections_opened")
+    elif event_name == "connection.start_tls.complete":
+        get_metrics().incr("tls_handshakes")
+
+
+def _count_request(request):
+    get_metrics().incr("http_requests")
+    request.extensions["trace"] = _trace_connections
+
+
+def pooled_http_client():
+    """An httpx client with a keep-alive connection pool sized for concurrent sessions."""
+    import httpx
+
+    # HTTP/2 needs the h2 package (httpx[http2]); without it the pool speaks HTTP/1.1
+    http2 = importlib.util.find_spec("h2") is not None
+    if not http2:
+        logging.warning("h2 is not installed; Supabase requests use HTTP/1.1.")
+    limits = httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                          keepalive_expiry=HTTP_KEEPALIVE_SECONDS)
+    # retries=1 reconnects once when a pooled connection turns out to be closed
+    transport = httpx.HTTPTransport(http2=http2, limits=limits, retries=1)
+    return httpx.Client(transport=transport, timeout=HTTP_TIMEOUT, follow_redirects=True,
+                        event_hooks={"request": [_count_request]})
+
+
+def http_pool_stats(client):
+    """Open and idle connections of a pooled_http_client()."""
+    # httpx keeps the httpcore pool on its transport
+    pool = getattr(client._transport, "_pool", None)
+    connections = list(getattr(pool, "connections", []))
+    return {
+        "connections": len(connections),
+        "idle": sum(connection.is_idle() for connection in connections),
+        "max_connections": HTTP_MAX_CONNECTIONS,
+    }
+
+
+def grpc_keepalive_options():
+    """gRPC channel options that keep the Gemini connection open between requests."""
+    return [
+        ("grpc.keepalive_time_ms", int(GEMINI_KEEPALIVE_SECONDS * 1000)),
+        ("grpc.keepalive_timeout_ms", int(CLIENT_HEALTH_TIMEOUT * 1000)),
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.http2.max_pings_without_data", 0),
+    ]
+
+
+class ManagedClient:
+    """A client built once per process behind a lock, and rebuilt when its health check fails.
+
+    build() returns a new client, ping(client) raises when it is unusable,
+    close(client) releases it and pool_stats(client) describes its
+    connections. Listeners registered with on_reconnect() are called with
+    the old and new client after a rebuild.
+    """
+
+    def __init__(self, name, build, ping, close=None, pool_stats=None):
+        self.name = name
+        self._build = build
+        self._ping = ping
+        self._close = close
+        self._pool_stats = pool_stats
+        self._client = None
+        self._listeners = []
+        self._lock = threading.Lock()
+        # held by the one thread running a health check; others carry on with the current client
+        self._check_lock = threading.Lock()
+        self.builds = 0
+        self.reconnects = 0
+        self.checks = 0
+        self.failed_checks = 0
+        self.healthy = None
+        self.last_error = None
+        self.check_ms = None
+        self._checked_at = 0.0
+
+    def on_reconnect(self, callback):
+        self._listeners.append(callback)
+
+    def get(self):
+        """Return the client, building it on first use."""
+        client = self._client
+        if client is not None:
+            return client
+        with self._lock:
+            if self._client is None:
+                self._client = self._build()
+                self.builds += 1
+                self._checked_at = time.monotonic()
+                logging.info(f"Created the {self.name} client.")
+            return self._client
+
+    def _reconnect(self, broken):
+        with self._lock:
+            if self._client is not broken:
+                # another thread already replaced it
+                return self._client
+            self._client = self._build()
+            self.builds += 1
+            self.reconnects += 1
+        logging.warning(f"Reconnected the {self.name} client.")
+        # point the users at the new client before the old one is closed
+        for callback in self._listeners:
+            try:
+                callback(broken, self._client)
+            except Exception as err:
+                logging.error(f"{self.name} reconnect listener failed: {err}")
+        if self._close is not None:
+            try:
+                self._close(broken)
+            except Exception as err:
+                logging.error(f"Error closing the old {self.name} client: {err}")
+        return self._client
+
+    def _run_check(self, client):
+        self._checked_at = time.monotonic()
+        self.checks += 1
+        start = time.perf_counter()
+        try:
+            self._ping(client)
+        except Exception as err:
+            self.failed_checks += 1
+            logging.warning(f"{self.name} health check failed: {err!r}")
+            try:
+                client = self._reconnect(client)
+                self._ping(client)
+            except Exception as err:
+                self.healthy, self.last_error = False, repr(err)
+                return False
+        self.check_ms = (time.perf_counter() - start) * 1000
+        self.healthy, self.last_error = True, None
+        return True
+
+    def check(self):
+        """Ping the client, rebuilding it once if the ping fails. True when healthy, None when never built."""
+        client = self._client
+        if client is None:
+            return None
+        with self._check_lock:
+            return self._run_check(client)
+
+    def check_if_due(self):
+        """Run a check when the last one is older than CLIENT_HEALTH_INTERVAL, unless another thread is running one."""
+        client = self._client
+        if client is None or time.monotonic() - self._checked_at < CLIENT_HEALTH_INTERVAL:
+            return
+        if not self._check_lock.acquire(blocking=False):
+            return
+        try:
+            # the thread that held the lock may have just checked
+            if time.monotonic() - self._checked_at >= CLIENT_HEALTH_INTERVAL:
+                self._run_check(client)
+        finally:
+            self._check_lock.release()
+
+    def stats(self):
+        client = self._client
+        row = {
+            "client": self.name,
+            "connected": client is not None,
+            "healthy": self.healthy,
+            "builds": self.builds,
+            "reconnects": self.reconnects,
+            "checks": self.checks,
+            "failed_checks": self.failed_checks,
+            "check_ms": self.check_ms,
+            "last_error": self.last_error,
+        }
+        if client is not None and self._pool_stats is not None:
+            try:
+                row.update(self._pool_stats(client))
+            except Exception as err:
+                logging.debug(f"No pool statistics for {self.name}: {err}")
+        return row
+
+
+class ClientManager:
+    """Registry of the process's network clients."""
+
+    def __init__(self):
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, build, ping, close=None, pool_stats=None):
+        """Return the ManagedClient for name, creating it on the first registration."""
+        with self._lock:
+            if name not in self._clients:
+                self._clients[name] = ManagedClient(name, build, ping, close, pool_stats)
+            return self._clients[name]
+
+    def check_all(self):
+        """Health-check every client that has been built; returns {name: healthy}."""
+        return {name: client.check() for name, client in list(self._clients.items())}
+
+    def stats(self):
+        return [client.stats() for client in list(self._clients.values())]
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_client_manager():
+    """Return the process-wide client manager."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = ClientManager()
+        return _manager
@@ -0,0 +1,294 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+
+from dbconnection import iter_cheque_details, on_insert
+from utils.metrics import get_metrics
+from utils.schema import to_typed_frame
+
+# local Parquet copy of cheque_details_tbl, one directory per upload month
+MIRROR_DIR = os.getenv("MIRROR_DIR", os.path.join(".checkmate", "mirror"))
+MIRROR_REFRESH_SECONDS = float(os.getenv("MIRROR_REFRESH_SECONDS", "60"))
+# a month's small delta files are merged into one once there are more than this many
+MIRROR_MAX_FILES_PER_MONTH = int(os.getenv("MIRROR_MAX_FILES_PER_MONTH", "16"))
+# fetched rows are held until this many have arrived, then written as one file per month
+MIRROR_ROWS_PER_WRITE = int(os.getenv("MIRROR_ROWS_PER_WRITE", "100000"))
+# hive partition value pyarrow reads back as null: rows without uploaded_at, which no month counts
+NULL_MONTH = "__HIVE_DEFAULT_PARTITION__"
+
+MIRROR_COLUMNS = ["id", "cheque_date", "account_number", "bank_name", "cheque_number", "payee_name",
+                  "amount", "uploaded_at", "status", "upload_date"]
+
+
+class ChequeMirror:
+    """Month-partitioned Parquet mirror of cheque_details_tbl, queried with pyarrow.
+
+    Files live under MIRROR_DIR/upload_month=YYYY-MM/, rows without an
+    upload time under the null partition. Each refresh fetches the rows after
+    the (uploaded_at, id) watermark stored in manifest.json and appends them
+    as one new file per month touched, per MIRROR_ROWS_PER_WRITE rows; busy
+    months are compacted. Only files listed in the manifest are read, so a refresh
+    interrupted before the manifest was written leaves no duplicates.
+    Aggregates read only the columns they need and skip months outside a
+    date range. Like the shared dataset, the mirror only sees new rows:
+    call rebuild() after rows are edited or deleted in the database.
+    """
+
+    def __init__(self, path=None, refresh_seconds=None):
+        self.path = path or MIRROR_DIR
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else MIRROR_REFRESH_SECONDS
+        self.refreshes = 0
+        self._stale = True
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+        self._manifest = self._read_manifest()
+        # pyarrow dataset over the manifest's files, rebuilt when the file list changes
+        self._dataset_cache = None
+
+    @property
+    def _manifest_path(self):
+        return os.path.join(self.path, "manifest.json")
+
+    def _read_manifest(self):
+        try:
+            with open(self._manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            manifest["watermark"] = tuple(manifest["watermark"]) if manifest["watermark"] else None
+            if not isinstance(manifest["files"], dict):
+                raise ValueError("manifest has no file list")
+            return manifest
+        except FileNotFoundError:
+            return _empty_manifest()
+        except (OSError, ValueError, KeyError, TypeError) as err:
+            logging.warning(f"Unreadable mirror manifest, rebuilding the mirror: {err}")
+            shutil.rmtree(self.path, ignore_errors=True)
+            return _empty_manifest()
+
+    def _write_manifest(self):
+        os.makedirs(self.path, exist_ok=True)
+        temp_path = f"{self._manifest_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f)
+        os.replace(temp_path, self._manifest_path)
+
+    def invalidate(self):
+        """Mark the mirror stale; the next query fetches rows newer than the watermark."""
+        self._stale = True
+
+    def _write_month(self, month, table):
+        """Write a month's new rows as a file; returns the month's file list, compacted when it grows long."""
+        import pyarrow.parquet as pq
+
+        month_dir = os.path.join(self.path, f"upload_month={month}")
+        os.makedirs(month_dir, exist_ok=True)
+        name = f"part-{uuid.uuid4().hex}.parquet"
+        pq.write_table(table, os.path.join(month_dir, name))
+        files = self._manifest["files"].get(month, []) + [name]
+
+        if len(files) > MIRROR_MAX_FILES_PER_MONTH:
+            name = f"part-{uuid.uuid4().hex}.parquet"
+            pq.write_table(pq.read_table([os.path.join(month_dir, old) for old in files]), os.path.join(month_dir, name))
+            files = [name]
+        return files
+
+    def _remove_unlisted(self, month):
+        # old files of a compacted month, and files of a refresh that never reached the manifest
+        month_dir = os.path.join(self.path, f"upload_month={month}")
+        listed = set(self._manifest["files"].get(month, []))
+        for name in os.listdir(month_dir):
+            if name not in listed:
+                os.remove(os.path.join(month_dir, name))
+
+    def _write_rows(self, frames, last):
+        """Write buffered typed rows, one file per month, and advance the watermark to last."""
+        import pandas as pd
+        import pyarrow as pa
+
+        typed = pd.concat(frames, ignore_index=True)
+        months = typed["upload_month"].astype(str).where(typed["upload_month"].notna(), NULL_MONTH)
+        written = {}
+        for month, rows in typed[MIRROR_COLUMNS].groupby(months, sort=False):
+            written[month] = self._write_month(month, pa.Table.from_pandas(rows, preserve_index=False))
+
+        # the watermark keeps the stored uploaded_at text, as the keyset filter compares it
+        self._manifest["watermark"] = (last["uploaded_at"], int(last["id"]))
+        self._manifest["rows"] += len(typed)
+        self._manifest["files"].update(written)
+        self._write_manifest()
+        self._dataset_cache = None
+        for month in written:
+            self._remove_unlisted(month)
+        return len(typed)
+
+    def _refresh(self):
+        self._stale = False
+        self._refreshed_at = time.monotonic()
+        added = 0
+        with get_metrics().stage("mirror_refresh"):
+            # a month's rows arrive over many fetched chunks; writing each chunk on its own would
+            # leave one file per chunk and month, and compact every month again and again
+            frames, buffered = [], 0
+            for chunk in iter_cheque_details(after=self._manifest["watermark"], as_frame=True):
+                typed = to_typed_frame(chunk)
+                typed["upload_date"] = typed["upload_day"].dt.date
+                typed["bank_name"] = typed["bank_name"].astype(object).where(typed["bank_name"].notna(), None)
+                typed["status"] = typed["status"].astype(object).where(typed["status"].notna(), None)
+                frames.append(typed)
+                buffered += len(typed)
+                last = chunk.iloc[-1]
+                if buffered >= MIRROR_ROWS_PER_WRITE:
+                    added += self._write_rows(frames, last)
+                    frames, buffered = [], 0
+            if frames:
+                added += self._write_rows(frames, last)
+        if added:
+            self.refreshes += 1
+            logging.info(f"Mirror refreshed with {added} new rows ({self._manifest['rows']} total).")
+        return added
+
+    def refresh(self, force=False):
+        """Fetch rows added since the last refresh, if the mirror is stale (or always with force)."""
+        with self._lock:
+            if force or self._stale or time.monotonic() - self._refreshed_at > self.refresh_seconds:
+                return self._refresh()
+            return 0
+
+    def rebuild(self):
+        """Drop the local files and mirror the whole table again."""
+        with self._lock:
+            shutil.rmtree(self.path, ignore_errors=True)
+            self._manifest = _empty_manifest()
+            self._dataset_cache = None
+            return self._refresh()
+
+    def _dataset(self):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        if self._dataset_cache is not None:
+            return self._dataset_cache
+        paths = [os.path.join(self.path, f"upload_month={month}", name)
+                 for month, names in sorted(self._manifest["files"].items()) for name in names]
+        if not paths:
+            return None
+        partitioning = ds.partitioning(pa.schema([("upload_month", pa.string())]), flavor="hive")
+        self._dataset_cache = ds.dataset(paths, format="parquet", partitioning=partitioning, partition_base_dir=self.path)
+        return self._dataset_cache
+
+    def aggregate(self, name, params):
+        """Compute one of the sql/aggregates.sql functions on the mirror, with the same result shape."""
+        import datetime
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+
+        self.refresh()
+        with self._lock:
+            dataset = self._dataset()
+        if dataset is None:
+            return _EMPTY_RESULTS.get(name, [])
+
+        if name == "cheque_overview":
+            for_date = datetime.date.fromisoformat(params["for_date"])
+            upload_dates = dataset.to_table(columns=["upload_date"])["upload_date"]
+            bounds = pc.min_max(upload_dates)
+            return [{
+                "total_count": len(upload_dates),
+                "today_count": dataset.count_rows(filter=(ds.field("upload_month") == params["for_date"][:7])
+                                                  & (ds.field("upload_date") == for_date)),
+                "failed_count": dataset.count_rows(filter=ds.field("status") == "Failed"),
+                "first_upload_date": _iso(bounds["min"]),
+                "last_upload_date": _iso(bounds["max"]),
+            }]
+
+        if name == "cheque_daily_counts":
+            table = dataset.to_table(columns=["upload_date"], filter=ds.field("upload_date").is_valid())
+            counts = table.group_by("upload_date").aggregate([([], "count_all")]).sort_by("upload_date")
+            return [{"upload_date": day.isoformat(), "count": count}
+                    for day, count in zip(counts["upload_date"].to_pylist(), counts["count_all"].to_pylist())]
+
+        if name == "cheque_monthly_counts":
+            # rows per month straight from the partition directories, without reading any column
+            counts = {}
+            for fragment in dataset.get_fragments():
+                # the null partition has no key: the SQL counts skip rows without uploaded_at too
+                month = ds.get_partition_keys(fragment.partition_expression).get("upload_month")
+                if month is not None:
+                    counts[month] = counts.get(month, 0) + fragment.count_rows()
+            return [{"upload_month": month, "count": count} for month, count in sorted(counts.items())]
+
+        if name == "cheque_bank_summary":
+            table = dataset.to_table(columns=["bank_name", "amount"])
+            summary = table.group_by("bank_name").aggregate([([], "count_all"), ("amount", "sum")])
+            rows = [{"bank_name": bank, "cheque_count": count, "total_amount": total or 0.0}
+                    for bank, count, total in zip(summary["bank_name"].to_pylist(), summary["count_all"].to_pylist(),
+                                                  summary["amount_sum"].to_pylist())]
+            return sorted(rows, key=lambda row: row["cheque_count"], reverse=True)
+
+        if name == "cheque_amount_stats":
+            start_date = datetime.date.fromisoformat(params["start_date"])
+            end_date = datetime.date.fromisoformat(params["end_date"])
+            # the month bounds skip whole partitions; the day bounds trim the edge months
+            months = (ds.field("upload_month") >= params["start_date"][:7]) & (ds.field("upload_month") <= params["end_date"][:7])
+            days = (ds.field("upload_date") >= start_date) & (ds.field("upload_date") <= end_date)
+            amounts = dataset.to_table(columns=["amount"], filter=months & days)["amount"]
+            bounds = pc.min_max(amounts)
+            return [{
+                "cheque_count": len(amounts),
+                "max_amount": bounds["max"].as_py(),
+                "min_amount": bounds["min"].as_py(),
+                "avg_amount": pc.mean(amounts).as_py(),
+            }]
+
+        raise ValueError(f"Unknown aggregate: {name}")
+
+    def stats(self):
+        files = self._manifest["files"]
+        size = 0
+        for month, names in files.items():
+            for name in names:
+                try:
+                    size += os.path.getsize(os.path.join(self.path, f"upload_month={month}", name))
+                except OSError:
+                    pass
+        return {
+            "rows": self._manifest["rows"],
+            "months": len(files),
+            "files": sum(len(names) for names in files.values()),
+            "bytes": size,
+            "refreshes": self.refreshes,
+            "watermark": self._manifest["watermark"],
+        }
+
+
+def _empty_manifest():
+    return {"watermark": None, "rows": 0, "files": {}}
+
+
+def _iso(scalar):
+    value = scalar.as_py()
+    return value.isoformat() if value is not None else None
+
+
+# what the SQL functions return on an empty table
+_EMPTY_RESULTS = {
+    "cheque_overview": [{"total_count": 0, "today_count": 0, "failed_count": 0,
+                         "first_upload_date": None, "last_upload_date": None}],
+    "cheque_amount_stats": [{"cheque_count": 0, "max_amount": None, "min_amount": None, "avg_amount": None}],
+}
+
+
+_mirror = None
+_mirror_lock = threading.Lock()
+
+def get_cheque_mirror():
+    """Return the process-wide Parquet mirror."""
+    global _mirror
+    with _mirror_lock:
+        if _mirror is None:
+            _mirror = ChequeMirror()
+            on_insert(_mirror.invalidate)
+        return _mirror
@@ -0,0 +1,110 @@
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+from dbconnection import iter_cheque_details, on_insert
+from utils.schema import concat_typed, empty_typed_frame, to_typed_frame
+
+# seconds between delta syncs when nothing in this process has inserted rows
+DATASET_REFRESH_SECONDS = float(os.getenv("DATASET_REFRESH_SECONDS", "60"))
+
+
+class ChequeDataset:
+    """Process-wide copy of cheque_details_tbl shared by every session.
+
+    The first read loads the whole table; later refreshes fetch only rows
+    after the (uploaded_at, id) watermark of the last row seen and append
+    them. Inserts made through dbconnection mark the dataset stale so the
+    next read picks them up. Rows are converted to the typed frame of
+    utils.schema once, as they arrive.
+    """
+
+    def __init__(self, refresh_seconds=None):
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else DATASET_REFRESH_SECONDS
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._frame = empty_typed_frame()
+        self._raw_bytes = 0
+        self._watermark = None
+        self._stale = True
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Mark the dataset stale; the next read fetches rows newer than the watermark."""
+        self._stale = True
+
+    def _needs_sync(self):
+        return self._stale or time.monotonic() - self._synced_at > self.refresh_seconds
+
+    def _sync(self):
+        # cleared before the fetch, so an invalidate() while it runs (a row written
+        # after the query) leaves the dataset stale for the next read
+        self._stale = False
+        try:
+            chunks = list(iter_cheque_details(after=self._watermark, as_frame=True))
+        except Exception:
+            self._stale = True
+            raise
+        self._synced_at = time.monotonic()
+        if not chunks:
+            return 0
+
+        raw_rows = pd.concat(chunks, ignore_index=True)
+        # the watermark keeps the stored uploaded_at text, as the keyset filter compares it
+        last = raw_rows.iloc[-1]
+        self._watermark = (last["uploaded_at"], int(last["id"]))
+        self._raw_bytes += int(raw_rows.memory_usage(deep=True, index=False).sum())
+        new_rows = to_typed_frame(raw_rows)
+        self._frame = concat_typed([self._frame, new_rows])
+        self.version += 1
+        logging.info(f"Dataset synced {len(new_rows)} new rows ({len(self._frame)} total).")
+        return len(new_rows)
+
+    def get_frame(self):
+        """Return the current dataset, syncing new rows first if it is stale.
+
+        The frame is a shallow copy: callers may add or replace columns but
+        must not modify values in place.
+        """
+        return self.get_versioned_frame()[0]
+
+    def get_versioned_frame(self):
+        """Return (frame, version) read together, for callers that cache results by version."""
+        with self._lock:
+            if self._needs_sync():
+                self.misses += 1
+                self._sync()
+            else:
+                self.hits += 1
+            return self._frame.copy(deep=False), self.version
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "rows": len(self._frame),
+            "bytes": int(self._frame.memory_usage(deep=True).sum()) if not self._frame.empty else 0,
+            "raw_bytes": self._raw_bytes,
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "watermark": self._watermark,
+        }
+
+
+_dataset = None
+_dataset_lock = threading.Lock()
+
+def get_cheque_dataset():
+    """Return the process-wide cheque dataset."""
+    global _dataset
+    with _dataset_lock:
+        if _dataset is None:
+            _dataset = ChequeDataset()
+            on_insert(_dataset.invalidate)
+        return _dataset
@@ -0,0 +1,98 @@
+import io
+import re
+from xml.sax.saxutils import escape
+
+import pandas as pd
+from docx import Document
+from docx.enum.text import WD_BREAK
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+
+# rows parsed into the document per lxml call
+PARSE_CHUNK_ROWS = 5000
+
+# characters that are not allowed in XML 1.0 text
+_INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _column_xml(series, cell_start):
+    """Cell XML for every row of a column, escaping each distinct value once."""
+    codes, uniques = pd.factorize(series.astype(str), use_na_sentinel=False)
+    cells = []
+    for text in uniques:
+        text = _INVALID_XML_CHARS.sub("", str(text))
+        if text:
+            space = ' xml:space="preserve"' if text != text.strip() else ""
+            cells.append(f'{cell_start}<w:p><w:r><w:t{space}>{escape(text)}</w:t></w:r></w:p></w:tc>')
+        else:
+            cells.append(f"{cell_start}<w:p><w:r/></w:p></w:tc>")
+    return pd.Series(cells, dtype=object).to_numpy()[codes] if cells else []
+
+
+def _add_table(doc, headers):
+    """Add an empty table with a header row, the same way python-docx would."""
+    table = doc.add_table(rows=1, cols=len(headers))
+    for cell, header in zip(table.rows[0].cells, headers):
+        cell.text = header
+    return table
+
+
+def write_docx_table(doc, dataframe, max_rows_per_table=None, page_break_between_tables=False):
+    """Append a DataFrame to doc as a table, building all row XML in bulk.
+
+    Row and cell XML is generated as strings per column and parsed in large
+    chunks, instead of python-docx's add_row() and cell.text per cell. With
+    max_rows_per_table, very large frames are split into several tables, each
+    with its own header row, separated by a paragraph (or a page break).
+    """
+    headers = [str(col) for col in dataframe.columns]
+    table = _add_table(doc, headers)
+    if dataframe.empty or not headers:
+        return [table]
+
+    # reuse the cell properties python-docx generated for the header row
+    widths = [cell.width for cell in table.rows[0].cells]
+    cell_starts = [
+        f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{width.twips if width is not None else 0}"/></w:tcPr>'
+        for width in widths
+    ]
+    columns = [_column_xml(dataframe[col], cell_starts[i]) for i, col in enumerate(dataframe.columns)]
+
+    tables = [table]
+    rows_in_table = 0
+    total_rows = len(dataframe)
+    step = min(PARSE_CHUNK_ROWS, max_rows_per_table or PARSE_CHUNK_ROWS)
+    start = 0
+    while start < total_rows:
+        if max_rows_per_table and rows_in_table >= max_rows_per_table:
+            paragraph = doc.add_paragraph()
+            if page_break_between_tables:
+                paragraph.add_run().add_break(WD_BREAK.PAGE)
+            table = _add_table(doc, headers)
+            tables.append(table)
+            rows_in_table = 0
+
+        end = min(start + step, total_rows)
+        if max_rows_per_table:
+            end = min(end, start + max_rows_per_table - rows_in_table)
+        rows_xml = "".join(
+            "<w:tr>" + "".join(cells) + "</w:tr>"
+            for cells in zip(*(column[start:end] for column in columns))
+        )
+        fragment = parse_xml(f"<w:tbl {nsdecls('w')}>{rows_xml}</w:tbl>")
+        table._tbl.extend(list(fragment))
+        rows_in_table += end - start
+        start = end
+    return tables
+
+
+def render_docx_table(dataframe, title="Cheque Records", max_rows_per_table=None):
+    """Render a DataFrame under a heading to an in-memory DOCX."""
+    doc = Document()
+    doc.add_heading(title, level=1)
+    write_docx_table(doc, dataframe, max_rows_per_table=max_rows_per_table)
+
+    output = io.BytesIO()
+    doc.save(output)
+    output.seek(0)
+    return output
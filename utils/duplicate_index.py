@@ -0,0 +1,162 @@
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+
+from dbconnection import cheque_key, get_write_buffer, iter_cheque_details, on_insert
+
+# keys the filter is sized for before it is rebuilt larger, and its false-positive rate at that size
+DUPLICATE_INDEX_CAPACITY = int(os.getenv("DUPLICATE_INDEX_CAPACITY", "1000000"))
+DUPLICATE_INDEX_ERROR_RATE = float(os.getenv("DUPLICATE_INDEX_ERROR_RATE", "0.01"))
+# seconds between catch-ups with rows other processes inserted
+DUPLICATE_INDEX_REFRESH_SECONDS = 60.0
+
+KEY_COLUMNS = ["bank_name", "account_number", "cheque_number", "uploaded_at", "id"]
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings: no false negatives, about error_rate false positives at capacity."""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        """Set the key's bits; True when any was unset, i.e. the key was certainly not in the filter yet."""
+        added = False
+        for position in self._positions(key):
+            mask = 1 << (position & 7)
+            if not self._bits[position >> 3] & mask:
+                self._bits[position >> 3] |= mask
+                added = True
+        # count estimates distinct keys, so adding a key twice does not inflate it
+        self.count += added
+        return added
+
+    def __contains__(self, key):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def error_rate(self):
+        """Expected false-positive rate at the current number of keys."""
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + self._bits.__sizeof__()
+
+
+class DuplicateIndex:
+    """In-process membership index of stored cheque keys (see dbconnection.cheque_key).
+
+    Warmed once from the three key columns of cheque_details_tbl and the
+    rows waiting in the write buffer, then kept current from the
+    (uploaded_at, id) watermark and by add() for rows as they are buffered.
+    A miss means the cheque is certainly new; a hit is only likely, so
+    callers confirm it with the write buffer's holds() and
+    find_duplicate_cheque() before acting on it.
+    """
+
+    def __init__(self, capacity=None, error_rate=None, refresh_seconds=None):
+        self.capacity = capacity or DUPLICATE_INDEX_CAPACITY
+        self.error_rate = error_rate or DUPLICATE_INDEX_ERROR_RATE
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else DUPLICATE_INDEX_REFRESH_SECONDS
+        self.checks = 0
+        self.hits = 0
+        self._filter = BloomFilter(self.capacity, self.error_rate)
+        self._watermark = None
+        self._stale = True
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Mark the index stale; the next check reads keys of rows newer than the watermark."""
+        self._stale = True
+
+    def _catch_up(self):
+        self._stale = False
+        self._synced_at = time.monotonic()
+        added = 0
+        if self._watermark is None:
+            # a new or rebuilt filter has not seen the buffered rows, which the table does not hold yet;
+            # read them first, so a row flushed meanwhile is still found in the table below
+            for key in get_write_buffer().buffered_keys():
+                added += self._filter.add(key)
+        for chunk in iter_cheque_details(columns=KEY_COLUMNS, after=self._watermark):
+            for row in chunk:
+                key = cheque_key(row)
+                if key is not None:
+                    added += self._filter.add(key)
+            self._watermark = (chunk[-1]["uploaded_at"], chunk[-1]["id"])
+        if added:
+            logging.info(f"Duplicate index loaded {added} cheque keys ({self._filter.count} total).")
+
+        if self._filter.count > self.capacity:
+            # past capacity the false-positive rate climbs; rebuild with room to grow
+            self.capacity = max(self.capacity, self._filter.count) * 2
+            self._filter = BloomFilter(self.capacity, self.error_rate)
+            self._watermark = None
+            logging.info(f"Rebuilding the duplicate index for {self.capacity} keys.")
+            self._catch_up()
+
+    def _refresh(self):
+        if self._stale or time.monotonic() - self._synced_at > self.refresh_seconds:
+            self._catch_up()
+
+    def might_contain(self, details):
+        """True when a cheque with the same natural key is probably stored or buffered."""
+        key = cheque_key(details)
+        if key is None:
+            return False
+        with self._lock:
+            self._refresh()
+            self.checks += 1
+            found = key in self._filter
+            self.hits += found
+            return found
+
+    def add(self, details):
+        """Record a cheque about to be buffered for writing, so later copies are flagged while it waits in the buffer.
+
+        Such hits are confirmed by the write buffer's holds(), since
+        find_duplicate_cheque() only sees the table; the catch-up that reads
+        the row back once it is written does not count its key twice.
+        """
+        key = cheque_key(details)
+        if key is not None:
+            with self._lock:
+                self._filter.add(key)
+
+    def stats(self):
+        return {
+            "keys": self._filter.count,
+            "capacity": self.capacity,
+            "bytes": self._filter.__sizeof__(),
+            "hashes": self._filter.hashes,
+            "error_rate": self._filter.error_rate(),
+            "checks": self.checks,
+            "hits": self.hits,
+        }
+
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_duplicate_index():
+    """Return the process-wide duplicate index."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = DuplicateIndex()
+            on_insert(_index.invalidate)
+        return _index
@@ -0,0 +1,85 @@
+import io
+import logging
+import os
+import threading
+
+import pandas as pd
+
+from utils.schema import to_display_frame
+
+# split DOCX exports into several tables past this many rows (0 keeps one table)
+DOCX_MAX_ROWS_PER_TABLE = int(os.getenv("DOCX_MAX_ROWS_PER_TABLE", "0")) or None
+
+
+# convert DataFrame to CSV
+def convert_df_to_csv(dataframe):
+    return dataframe.to_csv(index=False).encode('utf-8')
+
+# convert DataFrame to PDF
+def convert_df_to_pdf(dataframe):
+    from utils.pdf_table import render_pdf_table
+    return render_pdf_table(dataframe)
+
+# convert DataFrame to Excel
+def convert_df_to_excel(dataframe):
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
+        dataframe.to_excel(writer, index=False, sheet_name="Cheque Records")
+    output.seek(0)
+    return output
+
+# convert DataFrame to DOCX
+def convert_df_to_docx(dataframe):
+    from utils.docx_table import render_docx_table
+    return render_docx_table(dataframe, max_rows_per_table=DOCX_MAX_ROWS_PER_TABLE)
+
+
+# export format -> (converter, file name, mime type)
+EXPORT_FORMATS = {
+    "csv": (convert_df_to_csv, "cheque_records.csv", "text/csv"),
+    "pdf": (convert_df_to_pdf, "cheque_records.pdf", "application/pdf"),
+    "excel": (convert_df_to_excel, "cheque_records.xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "docx": (convert_df_to_docx, "cheque_records.docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+}
+
+def readable_frame(typed):
+    """Typed cheque records as export columns: display strings under title-case headers."""
+    return to_display_frame(typed).rename(columns=lambda x: x.replace("_", " ").title())
+
+# built artifacts keyed by (dataset version, format, columns)
+_artifacts = {}
+_build_locks = {}
+_artifacts_lock = threading.Lock()
+
+def get_export(dataframe, fmt, version, prepare=None):
+    """Build an export on first request and reuse its bytes until the dataset version changes.
+
+    prepare, if given, maps dataframe to the exported frame; it only runs when
+    the export is actually built.
+    """
+    key = (version, fmt, tuple(dataframe.columns))
+    with _artifacts_lock:
+        if key in _artifacts:
+            return _artifacts[key]
+        build_lock = _build_locks.setdefault(key, threading.Lock())
+
+    # one build per key; concurrent requests for the same key wait for it
+    with build_lock:
+        with _artifacts_lock:
+            if key in _artifacts:
+                return _artifacts[key]
+
+        converter = EXPORT_FORMATS[fmt][0]
+        data = converter(prepare(dataframe) if prepare is not None else dataframe)
+        if not isinstance(data, bytes):
+            data = data.getvalue()
+        logging.info(f"Built {fmt} export for dataset version {version} ({len(data)} bytes).")
+
+        with _artifacts_lock:
+            # artifacts for older dataset versions can never be requested again
+            for stale_key in [k for k in _artifacts if k[0] != version]:
+                del _artifacts[stale_key]
+            for stale_key in [k for k in _build_locks if k[0] != version]:
+                del _build_locks[stale_key]
+            _artifacts[key] = data
+        return data
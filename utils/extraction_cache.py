@@ -0,0 +1,148 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# extraction cache settings
+EXTRACTION_CACHE_PATH = os.getenv("EXTRACTION_CACHE_PATH", os.path.join(".checkmate", "extraction_cache.sqlite3"))
+EXTRACTION_CACHE_MAX_ENTRIES = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "50000"))
+EXTRACTION_CACHE_MAX_AGE_DAYS = float(os.getenv("EXTRACTION_CACHE_MAX_AGE_DAYS", "90"))
+EXTRACTION_CACHE_MEMORY_ENTRIES = int(os.getenv("EXTRACTION_CACHE_MEMORY_ENTRIES", "1024"))
+
+
+def page_digest(image, prompt, model_name):
+    """SHA-256 of a page's normalized pixels plus the prompt and model that read it.
+
+    Pixels are hashed after conversion to RGB, so the same scan re-encoded or
+    re-uploaded under another file name still maps to the same key.
+    """
+    normalized = image.convert("RGB")
+    digest = hashlib.sha256()
+    digest.update(model_name.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(prompt.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(f"{normalized.width}x{normalized.height}".encode("ascii"))
+    digest.update(normalized.tobytes())
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """Persistent SQLite cache of extraction results with an in-memory LRU front.
+
+    Entries older than max_age_days are dropped, and once the store holds more
+    than max_entries rows the least recently used ones are evicted.
+    """
+
+    def __init__(self, path=None, max_entries=None, max_age_days=None, memory_entries=None):
+        self.path = path or EXTRACTION_CACHE_PATH
+        self.max_entries = max_entries or EXTRACTION_CACHE_MAX_ENTRIES
+        self.max_age = (max_age_days if max_age_days is not None else EXTRACTION_CACHE_MAX_AGE_DAYS) * 86400
+        self.memory_entries = memory_entries or EXTRACTION_CACHE_MEMORY_ENTRIES
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts_since_evict = 0
+
+        cache_dir = os.path.dirname(self.path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS extraction_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_extraction_cache_accessed ON extraction_cache (accessed_at)")
+        self._conn.commit()
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Return a copy of the cached details for key, or None."""
+        now = time.time()
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return dict(self._memory[key])
+
+            row = self._conn.execute(
+                "SELECT value, created_at FROM extraction_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.max_age:
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE extraction_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            value = json.loads(row[0])
+            self._remember(key, value)
+            self.hits += 1
+            return dict(value)
+
+    def put(self, key, value):
+        """Store the details extracted for key."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extraction_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            self._conn.commit()
+            self._remember(key, dict(value))
+
+            # amortize eviction over many writes
+            self._puts_since_evict += 1
+            if self._puts_since_evict >= 100:
+                self._evict(now)
+
+    def _evict(self, now):
+        self._puts_since_evict = 0
+        self._conn.execute("DELETE FROM extraction_cache WHERE created_at < ?", (now - self.max_age,))
+        self._conn.execute(
+            "DELETE FROM extraction_cache WHERE key IN ("
+            "SELECT key FROM extraction_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self._conn.commit()
+        logging.info("Extraction cache eviction complete.")
+
+    def evict(self):
+        """Drop expired and least recently used entries now."""
+        with self._lock:
+            self._evict(time.time())
+            self._memory.clear()
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM extraction_cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "memory_entries": len(self._memory),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_extraction_cache():
+    """Return the process-wide extraction cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ExtractionCache()
+        return _cache
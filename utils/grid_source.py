@@ -0,0 +1,109 @@
+from datetime import date, timedelta
+
+from dbconnection import fetch_cheque_page
+from utils.schema import to_display_frame, to_typed_frame
+
+# records grid columns and the AG Grid filter each one offers
+GRID_COLUMNS = {
+    "cheque_date": "date",
+    "account_number": "text",
+    "bank_name": "text",
+    "cheque_number": "text",
+    "payee_name": "text",
+    "amount": "number",
+    "uploaded_at": "date",
+    "status": "text",
+}
+# filter options the database query can express, per filter kind
+FILTER_OPTIONS = {
+    "text": ["contains", "notContains", "equals", "notEqual", "startsWith", "endsWith"],
+    "number": ["equals", "notEqual", "greaterThan", "greaterThanOrEqual", "lessThan", "lessThanOrEqual", "inRange"],
+    "date": ["equals", "greaterThan", "lessThan", "inRange"],
+}
+DEFAULT_SORT = ("uploaded_at", True)
+
+TEXT_OPERATORS = {
+    "contains": ("ilike", "*{}*"),
+    "notContains": ("not_ilike", "*{}*"),
+    "equals": ("eq", "{}"),
+    "notEqual": ("neq", "{}"),
+    "startsWith": ("ilike", "{}*"),
+    "endsWith": ("ilike", "*{}"),
+}
+NUMBER_OPERATORS = {
+    "equals": "eq", "notEqual": "neq",
+    "greaterThan": "gt", "greaterThanOrEqual": "gte",
+    "lessThan": "lt", "lessThanOrEqual": "lte",
+}
+
+
+def _day(value):
+    # AG Grid sends dates as "YYYY-MM-DD HH:MM:SS"
+    return date.fromisoformat(str(value)[:10])
+
+
+def _date_filters(column, model):
+    """Date conditions as half-open day ranges, which hold for date strings and timestamps alike."""
+    kind = model.get("type")
+    if kind == "equals":
+        day = _day(model["dateFrom"])
+        return [(column, "gte", day.isoformat()), (column, "lt", (day + timedelta(days=1)).isoformat())]
+    if kind == "greaterThan":
+        return [(column, "gte", (_day(model["dateFrom"]) + timedelta(days=1)).isoformat())]
+    if kind == "lessThan":
+        return [(column, "lt", _day(model["dateFrom"]).isoformat())]
+    if kind == "inRange":
+        # AG Grid ranges exclude both ends
+        return [(column, "gte", (_day(model["dateFrom"]) + timedelta(days=1)).isoformat()),
+                (column, "lt", _day(model["dateTo"]).isoformat())]
+    raise ValueError(f"Unsupported date filter {kind} on {column}.")
+
+
+def _column_filters(column, model):
+    if "conditions" in model:
+        raise ValueError(f"Combined filters on {column} are not supported.")
+    kind = model.get("type")
+    filter_kind = GRID_COLUMNS.get(column)
+    if filter_kind == "text" and kind in TEXT_OPERATORS:
+        operator, pattern = TEXT_OPERATORS[kind]
+        return [(column, operator, pattern.format(model.get("filter", "")))]
+    if filter_kind == "number" and kind in NUMBER_OPERATORS:
+        return [(column, NUMBER_OPERATORS[kind], model["filter"])]
+    if filter_kind == "number" and kind == "inRange":
+        return [(column, "gt", model["filter"]), (column, "lt", model["filterTo"])]
+    if filter_kind == "date":
+        return _date_filters(column, model)
+    raise ValueError(f"Unsupported filter {kind} on {column}.")
+
+
+def grid_query(grid_state):
+    """Translate an AG Grid state (its sortModel and filterModel) to fetch_cheque_page() arguments.
+
+    Only the first sorted column is used. Raises ValueError for filters the
+    database query cannot express.
+    """
+    grid_state = grid_state or {}
+    sort_model = (grid_state.get("sort") or {}).get("sortModel") or []
+    sort_by, descending = DEFAULT_SORT
+    if sort_model and sort_model[0].get("colId") in GRID_COLUMNS:
+        sort_by, descending = sort_model[0]["colId"], sort_model[0].get("sort") == "desc"
+
+    filter_model = (grid_state.get("filter") or {}).get("filterModel") or {}
+    filters = []
+    for column, model in sorted(filter_model.items()):
+        filters.extend(_column_filters(column, model))
+    return {"sort_by": sort_by, "descending": descending, "filters": filters}
+
+
+def fetch_grid_block(query, page, page_size):
+    """One block of grid rows for a grid_query() result, and the number of matching rows.
+
+    Dates are display strings; amount stays numeric so the grid's number
+    filter and sort work on the block it holds.
+    """
+    rows, total = fetch_cheque_page((page - 1) * page_size, page_size, query["sort_by"], query["descending"],
+                                    filters=query["filters"])
+    typed = to_typed_frame(rows)
+    block = to_display_frame(typed, list(GRID_COLUMNS))
+    block["amount"] = typed["amount"]
+    return block, total
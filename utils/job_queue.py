@@ -0,0 +1,378 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# job queue settings
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", os.path.join(".checkmate", "jobs.sqlite3"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_DELAY = float(os.getenv("JOB_RETRY_DELAY", "5"))
+# finished uploads and their jobs are deleted after this many days
+JOB_RETENTION_DAYS = float(os.getenv("JOB_RETENTION_DAYS", "7"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    file_name TEXT NOT NULL,
+    file_digest TEXT NOT NULL,
+    page_count INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_uploads_digest ON uploads (file_digest);
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    upload_id INTEGER NOT NULL REFERENCES uploads (id),
+    page_index INTEGER NOT NULL,
+    image BLOB,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (status, next_attempt_at, id);
+CREATE INDEX IF NOT EXISTS idx_jobs_upload ON jobs (upload_id, status);
+"""
+
+# uploads columns added since the first release; uploads recorded before them
+# were queued page by page while the file was processed, so they are complete
+_UPLOAD_COLUMNS = [
+    ("status", "TEXT NOT NULL DEFAULT 'complete'"),
+    ("file_type", "TEXT"),
+    ("data", "BLOB"),
+    ("last_error", "TEXT"),
+]
+
+
+class SkippedPage:
+    """Handler result for a page that is finished without a row and must not be retried."""
+
+    def __init__(self, reason):
+        self.reason = reason
+
+    def __str__(self):
+        return self.reason
+
+
+class DeferredPage:
+    """Handler result for a page that was never attempted; it is requeued after delay seconds without using an attempt."""
+
+    def __init__(self, reason, delay):
+        self.reason = reason
+        self.delay = delay
+
+    def __str__(self):
+        return self.reason
+
+
+class JobQueue:
+    """Durable SQLite queue of page extraction jobs, drained by background workers.
+
+    An upload holds the raw file until a preparer thread has split it into
+    jobs, one encoded page each; the upload is then complete. Workers claim
+    pending jobs, run the handler on the page bytes, and mark each job done;
+    a failing job is retried with a growing delay up to max_attempts times.
+    Uploads being prepared and jobs left running by a process that died are
+    requeued when the queue is opened.
+    """
+
+    def __init__(self, path=None, max_attempts=None, retry_delay=None):
+        self.path = path or JOB_QUEUE_PATH
+        self.max_attempts = max_attempts or JOB_MAX_ATTEMPTS
+        self.retry_delay = retry_delay if retry_delay is not None else JOB_RETRY_DELAY
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._prepare_wakeup = threading.Event()
+        self._workers = []
+
+        queue_dir = os.path.dirname(self.path)
+        if queue_dir:
+            os.makedirs(queue_dir, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(uploads)")}
+        for column, definition in _UPLOAD_COLUMNS:
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE uploads ADD COLUMN {column} {definition}")
+        requeued = self._conn.execute("UPDATE jobs SET status = 'pending' WHERE status = 'running'").rowcount
+        # the preparer resumes after the last page it queued
+        reprepared = self._conn.execute("UPDATE uploads SET status = 'queued' WHERE status = 'preparing'").rowcount
+        self._conn.commit()
+        if requeued:
+            logging.info(f"Requeued {requeued} interrupted extraction jobs.")
+        if reprepared:
+            logging.info(f"Requeued {reprepared} interrupted uploads.")
+
+    def find_upload(self, file_digest):
+        """Id of an earlier upload of the same file that is still being prepared, or was completely queued and did not entirely fail, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT u.id FROM uploads u WHERE u.file_digest = ? AND (u.status IN ('queued', 'preparing') OR "
+                "(u.status = 'complete' AND EXISTS (SELECT 1 FROM jobs j WHERE j.upload_id = u.id AND j.status != 'failed'))) "
+                "ORDER BY u.id DESC LIMIT 1",
+                (file_digest,),
+            ).fetchone()
+        return row[0] if row else None
+
+    def create_upload(self, file_name, file_digest, file_type, data):
+        """Store an uploaded file for the preparer and wake it."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO uploads (file_name, file_digest, created_at, status, file_type, data) VALUES (?, ?, ?, 'queued', ?, ?)",
+                (file_name, file_digest, time.time(), file_type, sqlite3.Binary(data)),
+            )
+            self._conn.commit()
+        self._prepare_wakeup.set()
+        return cursor.lastrowid
+
+    def enqueue_page(self, upload_id, page_index, image_bytes):
+        """Queue one encoded page and wake a worker."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (upload_id, page_index, image) VALUES (?, ?, ?)",
+                (upload_id, page_index, sqlite3.Binary(image_bytes)),
+            )
+            self._conn.execute("UPDATE uploads SET page_count = page_count + 1 WHERE id = ?", (upload_id,))
+            self._conn.commit()
+        self._wakeup.set()
+
+    def skip_page(self, upload_id, page_index, reason):
+        """Record a page that was never queued for extraction, so the upload's status still lists it."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (upload_id, page_index, status, last_error, started_at, finished_at) "
+                "VALUES (?, ?, 'skipped', ?, ?, ?)",
+                (upload_id, page_index, reason, now, now),
+            )
+            self._conn.execute("UPDATE uploads SET page_count = page_count + 1 WHERE id = ?", (upload_id,))
+            self._conn.commit()
+
+    def _claim_upload(self):
+        """Mark the oldest queued upload as preparing; returns (id, file_type, data, first_page) or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, file_type, data FROM uploads WHERE status = 'queued' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            upload_id, file_type, data = row
+            self._conn.execute("UPDATE uploads SET status = 'preparing' WHERE id = ?", (upload_id,))
+            self._conn.commit()
+            queued = self._conn.execute("SELECT MAX(page_index) FROM jobs WHERE upload_id = ?", (upload_id,)).fetchone()[0]
+        return upload_id, file_type, bytes(data), 0 if queued is None else queued + 1
+
+    def _finish_upload(self, upload_id, error=None):
+        with self._lock:
+            # the raw file is no longer needed once its pages are queued
+            self._conn.execute(
+                "UPDATE uploads SET status = ?, data = NULL, last_error = ? WHERE id = ?",
+                ("failed" if error else "complete", error, upload_id),
+            )
+            self._conn.commit()
+
+    def _prepare(self, prepare):
+        while True:
+            upload = self._claim_upload()
+            if upload is None:
+                self._prepare_wakeup.wait(timeout=1.0)
+                self._prepare_wakeup.clear()
+                continue
+
+            upload_id, file_type, data, first_page = upload
+            try:
+                for page_index, image_bytes, skip_reason in prepare(file_type, data, first_page):
+                    if skip_reason:
+                        self.skip_page(upload_id, page_index, skip_reason)
+                    else:
+                        self.enqueue_page(upload_id, page_index, image_bytes)
+            except Exception as err:
+                logging.error(f"Preparing upload {upload_id} failed: {err}")
+                self._finish_upload(upload_id, str(err))
+            else:
+                self._finish_upload(upload_id)
+
+    def _claim(self, limit=1):
+        """Mark up to limit due jobs as running and return them."""
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, upload_id, page_index, image, attempts FROM jobs "
+                "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                (now, limit),
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                [(now, row[0]) for row in rows],
+            )
+            self._conn.commit()
+        return rows
+
+    def _complete(self, job_id):
+        with self._lock:
+            # the page image is no longer needed once the job is done
+            self._conn.execute(
+                "UPDATE jobs SET status = 'done', image = NULL, last_error = NULL, finished_at = ? WHERE id = ?",
+                (time.time(), job_id),
+            )
+            self._conn.commit()
+
+    def _skip(self, job_id, reason):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'skipped', image = NULL, last_error = ?, finished_at = ? WHERE id = ?",
+                (reason, time.time(), job_id),
+            )
+            self._conn.commit()
+
+    def _fail(self, job_id, attempts, error):
+        now = time.time()
+        with self._lock:
+            if attempts >= self.max_attempts:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', image = NULL, last_error = ?, finished_at = ? WHERE id = ?",
+                    (error, now, job_id),
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'pending', last_error = ?, next_attempt_at = ? WHERE id = ?",
+                    (error, now + self.retry_delay * 2 ** (attempts - 1), job_id),
+                )
+            self._conn.commit()
+
+    def _defer(self, job_id, reason, delay):
+        with self._lock:
+            # _claim counted an attempt that never reached the API
+            self._conn.execute(
+                "UPDATE jobs SET status = 'pending', attempts = attempts - 1, last_error = ?, next_attempt_at = ? WHERE id = ?",
+                (reason, time.time() + delay, job_id),
+            )
+            self._conn.commit()
+
+    def _work(self, handler, batch_size):
+        while True:
+            jobs = self._claim(batch_size)
+            if not jobs:
+                self._wakeup.wait(timeout=1.0)
+                self._wakeup.clear()
+                continue
+
+            try:
+                errors = handler([(bytes(image), upload_id, page_index) for _, upload_id, page_index, image, _ in jobs])
+            except Exception as err:
+                errors = [str(err)] * len(jobs)
+
+            for (job_id, upload_id, page_index, _, attempts), error in zip(jobs, errors):
+                if error is None:
+                    self._complete(job_id)
+                elif isinstance(error, SkippedPage):
+                    self._skip(job_id, error.reason)
+                elif isinstance(error, DeferredPage):
+                    logging.info(f"Job {job_id} (upload {upload_id}, page {page_index + 1}) deferred {error.delay:.1f}s: {error}")
+                    self._defer(job_id, error.reason, error.delay)
+                else:
+                    logging.warning(f"Job {job_id} (upload {upload_id}, page {page_index + 1}) failed on attempt {attempts + 1}: {error}")
+                    self._fail(job_id, attempts + 1, str(error))
+
+    def start_workers(self, count, handler, prepare, batch_size=1):
+        """Start the preparer and count background workers once per process; later calls are no-ops.
+
+        The preparer calls prepare(file_type, data, first_page) for each
+        upload, which yields (page_index, image_bytes, skip_reason) for its
+        pages from first_page on; a page with a skip reason is recorded as
+        skipped instead of queued. Each worker claims up to batch_size jobs
+        at a time and calls handler(jobs) with a list of (image_bytes,
+        upload_id, page_index). The handler returns one entry per job: None
+        on success, a SkippedPage to finish the job without a row, a
+        DeferredPage to requeue it without using an attempt, or an error
+        message to have that job retried.
+        """
+        with self._lock:
+            if self._workers:
+                return
+            preparer = threading.Thread(target=self._prepare, args=(prepare,), name="job-preparer", daemon=True)
+            preparer.start()
+            self._workers.append(preparer)
+            for i in range(max(1, count)):
+                worker = threading.Thread(target=self._work, args=(handler, max(1, batch_size)), name=f"job-worker-{i}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+        logging.info(f"Started {len(self._workers) - 1} extraction job workers.")
+        # once per process: the queue would otherwise keep every upload's history
+        self.purge()
+
+    def upload_status(self, limit=10):
+        """Progress of the most recent uploads, newest first."""
+        with self._lock:
+            uploads = self._conn.execute(
+                "SELECT id, file_name, page_count, created_at, status, last_error FROM uploads ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+            status = []
+            for upload_id, file_name, page_count, created_at, upload_status, upload_error in uploads:
+                counts = dict(self._conn.execute(
+                    "SELECT status, COUNT(*) FROM jobs WHERE upload_id = ? GROUP BY status", (upload_id,)
+                ).fetchall())
+                first_start, last_finish = self._conn.execute(
+                    "SELECT MIN(started_at), MAX(finished_at) FROM jobs WHERE upload_id = ?", (upload_id,)
+                ).fetchone()
+                errors = self._conn.execute(
+                    "SELECT page_index, last_error FROM jobs WHERE upload_id = ? AND status = 'failed' ORDER BY page_index",
+                    (upload_id,),
+                ).fetchall()
+                skipped = self._conn.execute(
+                    "SELECT page_index, last_error FROM jobs WHERE upload_id = ? AND status = 'skipped' ORDER BY page_index",
+                    (upload_id,),
+                ).fetchall()
+                finished = counts.get("done", 0) + counts.get("failed", 0) + counts.get("skipped", 0)
+                elapsed = (last_finish - first_start) if first_start and last_finish else 0
+                status.append({
+                    "upload_id": upload_id,
+                    "file_name": file_name,
+                    "page_count": page_count,
+                    "created_at": created_at,
+                    "status": upload_status,
+                    "error": upload_error,
+                    "pending": counts.get("pending", 0),
+                    "running": counts.get("running", 0),
+                    "done": counts.get("done", 0),
+                    "failed": counts.get("failed", 0),
+                    "skipped": counts.get("skipped", 0),
+                    "finished": finished,
+                    "pages_per_second": finished / elapsed if elapsed > 0 else 0.0,
+                    "errors": errors,
+                    "skipped_pages": skipped,
+                })
+        return status
+
+    def purge(self, older_than_days=None):
+        """Delete finished uploads and their jobs older than the given age (JOB_RETENTION_DAYS by default)."""
+        days = JOB_RETENTION_DAYS if older_than_days is None else older_than_days
+        cutoff = time.time() - days * 86400
+        with self._lock:
+            finished = "SELECT id FROM uploads WHERE created_at < ? AND status IN ('complete', 'failed')"
+            jobs = self._conn.execute(
+                f"DELETE FROM jobs WHERE upload_id IN ({finished}) AND status IN ('done', 'failed', 'skipped')",
+                (cutoff,),
+            ).rowcount
+            uploads = self._conn.execute(
+                f"DELETE FROM uploads WHERE id IN ({finished}) AND NOT EXISTS (SELECT 1 FROM jobs WHERE jobs.upload_id = uploads.id)",
+                (cutoff,),
+            ).rowcount
+            self._conn.commit()
+        if uploads or jobs:
+            logging.info(f"Purged {uploads} uploads and {jobs} jobs older than {days:g} days.")
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+def get_job_queue():
+    """Return the process-wide job queue."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
@@ -0,0 +1,200 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# pipeline metrics settings
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "2048"))
+METRICS_JSON_LOGS = os.getenv("METRICS_JSON_LOGS", "true").lower() in ("1", "true", "yes")
+METRICS_FILE = os.getenv("METRICS_FILE", os.path.join(".checkmate", "metrics.prom"))
+METRICS_EXPORT_INTERVAL = float(os.getenv("METRICS_EXPORT_INTERVAL", "15"))
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# one bare JSON object per line, so log shippers can parse stage timings
+metrics_logger = logging.getLogger("checkmate.metrics")
+if not metrics_logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    metrics_logger.addHandler(_handler)
+    metrics_logger.setLevel(logging.INFO)
+    metrics_logger.propagate = False
+
+
+def _quantile(ordered, q):
+    """Nearest-rank quantile of an already sorted list."""
+    return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))]
+
+
+class PipelineMetrics:
+    """Thread-safe per-stage latency samples plus byte and row counters.
+
+    Percentiles are computed over the most recent window samples of each
+    stage; counts, sums and error totals cover the life of the process.
+    """
+
+    def __init__(self, window=None, json_logs=None):
+        self.window = window or METRICS_WINDOW
+        self.json_logs = METRICS_JSON_LOGS if json_logs is None else json_logs
+        self.started_at = time.time()
+        self._samples = {}
+        self._totals = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds, ok=True, **fields):
+        """Record one timing for stage."""
+        with self._lock:
+            if stage not in self._samples:
+                self._samples[stage] = deque(maxlen=self.window)
+                self._totals[stage] = {"count": 0, "sum": 0.0, "errors": 0}
+            self._samples[stage].append(seconds)
+            totals = self._totals[stage]
+            totals["count"] += 1
+            totals["sum"] += seconds
+            if not ok:
+                totals["errors"] += 1
+        if self.json_logs:
+            metrics_logger.info(json.dumps({
+                "ts": round(time.time(), 3), "event": "stage", "stage": stage, "duration_ms": round(seconds * 1000, 3), "ok": ok,
+                "thread": threading.current_thread().name, **fields,
+            }, default=str))
+
+    @contextmanager
+    def stage(self, stage, **fields):
+        """Time the body of a with block as one sample of stage; fields go to the JSON log."""
+        start = time.perf_counter()
+        ok = True
+        try:
+            yield fields
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - start, ok=ok, **fields)
+
+    def timed_iter(self, iterable, stage):
+        """Yield from iterable, timing how long each item takes to produce."""
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.observe(stage, time.perf_counter() - start)
+            yield item
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def counters(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def summary(self):
+        """Return one dict per stage: count, errors, mean, max and p50/p95/p99 in milliseconds."""
+        with self._lock:
+            snapshot = {stage: (sorted(samples), dict(self._totals[stage])) for stage, samples in self._samples.items()}
+        rows = []
+        for stage, (ordered, totals) in snapshot.items():
+            row = {"stage": stage, "count": totals["count"], "errors": totals["errors"],
+                   "mean_ms": totals["sum"] / totals["count"] * 1000, "max_ms": ordered[-1] * 1000}
+            for q in QUANTILES:
+                row[f"p{int(q * 100)}_ms"] = _quantile(ordered, q) * 1000
+            rows.append(row)
+        return rows
+
+    def render_prometheus(self):
+        """Render the metrics in the Prometheus text exposition format."""
+        with self._lock:
+            snapshot = {stage: (sorted(samples), dict(self._totals[stage])) for stage, samples in self._samples.items()}
+            counters = dict(self._counters)
+
+        lines = [
+            "# HELP checkmate_stage_duration_seconds Pipeline stage latency over the recent sample window.",
+            "# TYPE checkmate_stage_duration_seconds summary",
+        ]
+        for stage, (ordered, totals) in snapshot.items():
+            for q in QUANTILES:
+                lines.append(f'checkmate_stage_duration_seconds{{stage="{stage}",quantile="{q}"}} {_quantile(ordered, q):.6f}')
+            lines.append(f'checkmate_stage_duration_seconds_sum{{stage="{stage}"}} {totals["sum"]:.6f}')
+            lines.append(f'checkmate_stage_duration_seconds_count{{stage="{stage}"}} {totals["count"]}')
+        lines += [
+            "# HELP checkmate_stage_errors_total Stage executions that raised.",
+            "# TYPE checkmate_stage_errors_total counter",
+        ]
+        for stage, (_, totals) in snapshot.items():
+            lines.append(f'checkmate_stage_errors_total{{stage="{stage}"}} {totals["errors"]}')
+        for name, value in sorted(counters.items()):
+            lines.append(f"# TYPE checkmate_{name}_total counter")
+            lines.append(f"checkmate_{name}_total {value}")
+        lines.append("# TYPE checkmate_process_start_time_seconds gauge")
+        lines.append(f"checkmate_process_start_time_seconds {self.started_at:.3f}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path=None):
+        """Atomically write the Prometheus text file (for node_exporter's textfile collector)."""
+        path = path or METRICS_FILE
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+
+def _export_loop(metrics):
+    while True:
+        time.sleep(METRICS_EXPORT_INTERVAL)
+        try:
+            metrics.write_prometheus()
+        except OSError as err:
+            logging.error(f"Failed to write metrics file: {err}")
+
+
+def _serve_metrics(metrics, port):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logging.info(f"Serving Prometheus metrics on port {port} at /metrics.")
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+def get_metrics():
+    """Return the process-wide pipeline metrics, starting the exporters on first use."""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = PipelineMetrics()
+            if METRICS_FILE:
+                threading.Thread(target=_export_loop, args=(_metrics,), name="metrics-export", daemon=True).start()
+            if METRICS_PORT:
+                try:
+                    _serve_metrics(_metrics, METRICS_PORT)
+                except OSError as err:
+                    logging.error(f"Could not start the metrics endpoint on port {METRICS_PORT}: {err}")
+        return _metrics
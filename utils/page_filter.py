@@ -0,0 +1,78 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+# "blank" skips empty pages only; "strict" also skips pages whose content is not cheque-shaped; "off" sends every page
+PAGE_FILTER_MODE = os.getenv("PAGE_FILTER_MODE", "blank").lower()
+# share of thumbnail pixels that are ink / strong edges below which a page counts as blank
+PAGE_FILTER_MIN_INK = float(os.getenv("PAGE_FILTER_MIN_INK", "0.001"))
+PAGE_FILTER_MIN_EDGES = float(os.getenv("PAGE_FILTER_MIN_EDGES", "0.0005"))
+# strict mode: the inked region's long/short side ratio a cheque falls in, and the most ink a cheque carries
+PAGE_FILTER_MIN_ASPECT = float(os.getenv("PAGE_FILTER_MIN_ASPECT", "1.6"))
+PAGE_FILTER_MAX_ASPECT = float(os.getenv("PAGE_FILTER_MAX_ASPECT", "4.0"))
+PAGE_FILTER_MAX_INK = float(os.getenv("PAGE_FILTER_MAX_INK", "0.45"))
+
+# pages are measured on a thumbnail of this long edge, ignoring a margin where scanners leave shadows
+_THUMB_EDGE = 512
+_MARGIN = 0.03
+# grey levels a pixel must be below the paper, or differ from its neighbour, to count as ink / an edge
+_INK_CONTRAST = 30
+_EDGE_CONTRAST = 40
+
+
+def page_features(image):
+    """Ink coverage, edge density and the inked region's aspect ratio, from a grayscale thumbnail."""
+    thumb = image.convert("L")
+    thumb.thumbnail((_THUMB_EDGE, _THUMB_EDGE), Image.BILINEAR)
+    pixels = np.asarray(thumb, dtype=np.int16)
+    margin_y = int(pixels.shape[0] * _MARGIN)
+    margin_x = int(pixels.shape[1] * _MARGIN)
+    pixels = pixels[margin_y:pixels.shape[0] - margin_y, margin_x:pixels.shape[1] - margin_x]
+    if pixels.size == 0:
+        return {"ink": 0.0, "edges": 0.0, "aspect": 0.0}
+
+    # the paper is the bright end of the histogram, whatever the scan's exposure
+    paper = np.percentile(pixels, 90)
+    ink = pixels < paper - _INK_CONTRAST
+    edges = (np.abs(np.diff(pixels, axis=1))[:-1] > _EDGE_CONTRAST) | (np.abs(np.diff(pixels, axis=0))[:, :-1] > _EDGE_CONTRAST)
+
+    rows = np.flatnonzero(ink.mean(axis=1) > 0.01)
+    cols = np.flatnonzero(ink.mean(axis=0) > 0.01)
+    aspect = 0.0
+    if len(rows) and len(cols):
+        height, width = rows[-1] - rows[0] + 1, cols[-1] - cols[0] + 1
+        aspect = max(width, height) / min(width, height)
+    return {"ink": float(ink.mean()), "edges": float(edges.mean()), "aspect": float(aspect)}
+
+
+def classify_page(image, mode=None):
+    """Decide whether a page is worth sending to the model.
+
+    Returns (reason, features): reason is None for pages to extract, or a
+    short description of why the page is skipped.
+    """
+    mode = (mode or PAGE_FILTER_MODE).lower()
+    if mode == "off":
+        return None, {}
+
+    features = page_features(image)
+    if features["ink"] < PAGE_FILTER_MIN_INK or features["edges"] < PAGE_FILTER_MIN_EDGES:
+        return "blank page", features
+    if mode == "strict":
+        if features["ink"] > PAGE_FILTER_MAX_INK:
+            return "page is mostly ink, not a cheque", features
+        if not PAGE_FILTER_MIN_ASPECT <= features["aspect"] <= PAGE_FILTER_MAX_ASPECT:
+            return f"content is not cheque-shaped (aspect {features['aspect']:.1f})", features
+    return None, features
+
+
+def estimated_seconds_saved(metrics):
+    """Gemini time the skipped pages would have cost, at this process's measured seconds per page."""
+    counters = metrics.counters()
+    images = counters.get("gemini_images", 0)
+    gemini = next((row for row in metrics.summary() if row["stage"] == "gemini"), None)
+    if not images or gemini is None:
+        return None
+    seconds_per_page = gemini["mean_ms"] * gemini["count"] / 1000 / images
+    return counters.get("pages_skipped", 0) * seconds_per_page
@@ -0,0 +1,238 @@
+import io
+import zlib
+
+import numpy as np
+import pandas as pd
+from fpdf.fonts import fpdf_charwidths
+
+# page geometry in mm (A4) and PDF points per mm
+PAGE_SIZES = {"L": (297.0, 210.0), "P": (210.0, 297.0)}
+POINTS_PER_MM = 72 / 25.4
+
+
+class FontMetrics:
+    """Width lookups for a core PDF font, backed by a per-byte width table."""
+
+    def __init__(self, family="helvetica", size=10):
+        char_widths = fpdf_charwidths[family]
+        self.size = size
+        scale = size / POINTS_PER_MM / 1000  # font units -> mm
+        self.byte_widths = np.array([char_widths.get(chr(code), 0) * scale for code in range(256)])
+        self._char_widths = self.byte_widths.tolist()
+
+    def width(self, text):
+        return float(self.byte_widths[np.frombuffer(text.encode("latin-1"), dtype=np.uint8)].sum())
+
+    def widths(self, texts):
+        """Widths for a sequence of latin-1 strings in one vectorized pass."""
+        texts = list(texts)
+        if not texts:
+            return np.zeros(0)
+        lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+        codes = np.frombuffer("".join(texts).encode("latin-1"), dtype=np.uint8)
+        char_widths = np.concatenate([[0.0], np.cumsum(self.byte_widths[codes])])
+        ends = np.cumsum(lengths)
+        return char_widths[ends] - char_widths[ends - lengths]
+
+    def wrap(self, text, max_width):
+        """Greedy word wrap, breaking inside words that are wider than a line."""
+        char_widths = self._char_widths
+        space = char_widths[32]
+        lines, line, line_width = [], "", 0.0
+        for word in text.split(" "):
+            word_width = sum([char_widths[ord(ch)] for ch in word])
+            if line and line_width + space + word_width <= max_width:
+                line, line_width = f"{line} {word}", line_width + space + word_width
+                continue
+            if not line and word_width <= max_width:
+                line, line_width = word, word_width
+                continue
+            if line:
+                lines.append(line)
+            line, line_width = "", 0.0
+            for ch in word:
+                ch_width = char_widths[ord(ch)]
+                if line and line_width + ch_width > max_width:
+                    lines.append(line)
+                    line, line_width = "", 0.0
+                line, line_width = line + ch, line_width + ch_width
+        lines.append(line)
+        return lines
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+class _PdfStreamWriter:
+    """Minimal PDF writer that emits each page as soon as it is laid out."""
+
+    def __init__(self, output, page_width, page_height, compress=True):
+        self.output = output
+        self.page_width = page_width * POINTS_PER_MM
+        self.page_height = page_height * POINTS_PER_MM
+        self.compress = compress
+        self.offsets = {}
+        self.position = 0
+        self.page_ids = []
+        self.next_id = 4  # 1 catalog, 2 page tree, 3 font
+
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        self._object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    def _write(self, data):
+        self.output.write(data)
+        self.position += len(data)
+
+    def _object(self, object_id, body):
+        self.offsets[object_id] = self.position
+        self._write(b"%d 0 obj\n" % object_id + body + b"\nendobj\n")
+
+    def add_page(self, content):
+        data = content.encode("latin-1")
+        if self.compress:
+            data = zlib.compress(data)
+            header = b"<< /Length %d /Filter /FlateDecode >>" % len(data)
+        else:
+            header = b"<< /Length %d >>" % len(data)
+        content_id, page_id = self.next_id, self.next_id + 1
+        self.next_id += 2
+        self._object(content_id, header + b"\nstream\n" + data + b"\nendstream")
+        self._object(page_id, (
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] "
+            "/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+            % (self.page_width, self.page_height, content_id)
+        ).encode("ascii"))
+        self.page_ids.append(page_id)
+
+    def close(self):
+        kids = " ".join(f"{page_id} 0 R" for page_id in self.page_ids)
+        self._object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>".encode("ascii"))
+        xref_position = self.position
+        count = self.next_id
+        lines = [b"xref\n0 %d\n" % count, b"0000000000 65535 f \n"]
+        lines.extend(b"%010d 00000 n \n" % self.offsets[object_id] for object_id in range(1, count))
+        self._write(b"".join(lines))
+        self._write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (count, xref_position))
+
+
+def _column_cells(series):
+    """Distinct latin-1 safe strings of a column plus the row -> distinct value codes."""
+    codes, uniques = pd.factorize(series.astype(str), use_na_sentinel=False)
+    texts = [str(text).encode("latin-1", "replace").decode("latin-1").replace("\r", " ").replace("\n", " ")
+             for text in uniques]
+    return codes, texts
+
+
+def write_pdf_table(dataframe, output, orientation="L", font_size=10, row_height=8,
+                    margin=10, bottom_margin=15, compress=True):
+    """Render a DataFrame as a bordered table and write the PDF to output.
+
+    output may be a path or a binary file-like object. Column widths follow the
+    header text (at least 30mm, scaled down to fit the page), cells wrap inside
+    their column, and the header row repeats on every page. Widths and wrap
+    line counts are computed per column over distinct values before layout;
+    pages are then laid out in one pass and written out as each one fills.
+    Returns the number of bytes written.
+    """
+    if isinstance(output, (str, bytes)) or hasattr(output, "__fspath__"):
+        with open(output, "wb") as f:
+            return write_pdf_table(dataframe, f, orientation, font_size, row_height, margin, bottom_margin, compress)
+
+    k = POINTS_PER_MM
+    page_width, page_height = PAGE_SIZES[orientation]
+    metrics = FontMetrics(size=font_size)
+    cell_margin = margin / 10
+    baseline = 0.5 * row_height + 0.3 * font_size / k
+
+    headers = [str(col).encode("latin-1", "replace").decode("latin-1") for col in dataframe.columns]
+    col_widths = np.maximum(metrics.widths(headers) + 10, 30)
+    usable_width = page_width - 2 * margin
+    if col_widths.sum() > usable_width:
+        col_widths *= usable_width / col_widths.sum()
+    col_x = margin + np.concatenate([[0], np.cumsum(col_widths)[:-1]])
+    text_widths = col_widths - 2 * cell_margin
+
+    # vectorized pass over distinct values: escaped text, widths and wrapped lines
+    first_lines, line_counts, extra_lines = [], [], []
+    for i, col in enumerate(dataframe.columns):
+        codes, texts = _column_cells(dataframe[col])
+        widths = metrics.widths(texts)
+        wrapped = {j: metrics.wrap(texts[j], text_widths[i]) for j in np.flatnonzero(widths > text_widths[i])}
+        first = np.empty(len(texts), dtype=object)
+        first[:] = [_escape(wrapped[j][0] if j in wrapped else text) for j, text in enumerate(texts)]
+        counts = np.ones(len(texts), dtype=int)
+        for j, lines in wrapped.items():
+            counts[j] = len(lines)
+        first_lines.append(first[codes])
+        line_counts.append(counts[codes])
+        if wrapped:
+            extra_lines.append((i, codes, {j: [_escape(line) for line in lines[1:]] for j, lines in wrapped.items()}))
+    row_lines = np.maximum.reduce(line_counts) if line_counts else np.zeros(len(dataframe), dtype=int)
+
+    # per-row operator templates: one text object and one set of borders per row
+    text_x = (col_x + cell_margin) * k
+    text_start = f"BT {text_x[0]:.2f} " if len(text_x) else ""
+    text_separators = [f") Tj {dx:.2f} 0 Td (" for dx in np.diff(text_x)]
+    border_templates = {}
+
+    def borders(y_top, lines):
+        template = border_templates.get(lines)
+        if template is None:
+            height = -row_height * lines * k
+            template = border_templates[lines] = "\n".join(
+                f"{x * k:.2f} {{0}} {w * k:.2f} {height:.2f} re S" for x, w in zip(col_x, col_widths)
+            )
+        return template.format(f"{(page_height - y_top) * k:.2f}")
+
+    def text_row(y_top, cells):
+        if not len(cells):
+            return ""
+        parts = [text_start, f"{(page_height - y_top - baseline) * k:.2f} Td (", cells[0]]
+        for separator, cell in zip(text_separators, cells[1:]):
+            parts.append(separator)
+            parts.append(cell)
+        parts.append(") Tj ET")
+        return "".join(parts)
+
+    header_cells = [_escape(header) for header in headers]
+    page_start = f"0.57 w BT /F1 {font_size:.2f} Tf ET"
+    page_bottom = page_height - bottom_margin
+    writer = _PdfStreamWriter(output, page_width, page_height, compress=compress)
+
+    def start_page():
+        return [page_start, borders(margin, 1), text_row(margin, header_cells)], margin + row_height
+
+    ops, y = start_page()
+    rows_on_page = 0
+    cells_by_row = zip(*first_lines) if first_lines else iter(())
+    for row, cells in enumerate(cells_by_row):
+        lines = int(row_lines[row])
+        height = row_height * lines
+        if y + height > page_bottom and rows_on_page:
+            writer.add_page("\n".join(ops))
+            ops, y = start_page()
+            rows_on_page = 0
+
+        ops.append(borders(y, lines))
+        ops.append(text_row(y, cells))
+        if lines > 1:
+            for i, codes, wrapped in extra_lines:
+                for line_no, line in enumerate(wrapped.get(codes[row], ()), start=1):
+                    line_y = (page_height - y - line_no * row_height - baseline) * k
+                    ops.append(f"BT {text_x[i]:.2f} {line_y:.2f} Td ({line}) Tj ET")
+        y += height
+        rows_on_page += 1
+
+    writer.add_page("\n".join(ops))
+    writer.close()
+    return writer.position
+
+
+def render_pdf_table(dataframe, **options):
+    """Render a DataFrame table to an in-memory PDF."""
+    output = io.BytesIO()
+    write_pdf_table(dataframe, output, **options)
+    output.seek(0)
+    return output
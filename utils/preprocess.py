@@ -0,0 +1,123 @@
+import io
+import logging
+import os
+
+import numpy as np
+from PIL import Image, ImageOps
+
+# preprocessing settings
+PREPROCESS_MAX_LONG_EDGE = int(os.getenv("PREPROCESS_MAX_LONG_EDGE", "1600"))
+PREPROCESS_GRAYSCALE = os.getenv("PREPROCESS_GRAYSCALE", "false").lower() in ("1", "true", "yes")
+PREPROCESS_DESKEW = os.getenv("PREPROCESS_DESKEW", "false").lower() in ("1", "true", "yes")
+PREPROCESS_AUTOCROP = os.getenv("PREPROCESS_AUTOCROP", "false").lower() in ("1", "true", "yes")
+PREPROCESS_JPEG_QUALITY = int(os.getenv("PREPROCESS_JPEG_QUALITY", "85"))
+
+# analysis runs on a thumbnail of this long edge
+_ANALYSIS_EDGE = 400
+
+
+def _pixel_bytes(image):
+    return image.width * image.height * len(image.getbands())
+
+
+def _analysis_mask(image):
+    """Thumbnail-scale boolean mask of 'ink' pixels plus the thumbnail scale factor."""
+    thumb = image.convert("L")
+    thumb.thumbnail((_ANALYSIS_EDGE, _ANALYSIS_EDGE))
+    pixels = np.asarray(thumb, dtype=np.int16)
+    # the border is mostly background; anything clearly darker than it is ink
+    border = np.concatenate([pixels[0], pixels[-1], pixels[:, 0], pixels[:, -1]])
+    background = np.median(border)
+    return pixels < background - 40, image.width / thumb.width
+
+
+def _deskew_angle(mask, max_angle=5.0, step=0.5):
+    """Angle (degrees) that makes text rows most horizontal, by projection profile variance."""
+    if mask.sum() < 50:
+        return 0.0
+    thumb = Image.fromarray(mask.astype(np.uint8) * 255)
+    best_angle, best_score = 0.0, -1.0
+    for angle in np.arange(-max_angle, max_angle + step / 2, step):
+        rotated = np.asarray(thumb.rotate(angle, resample=Image.BILINEAR, fillcolor=0), dtype=np.float32)
+        score = rotated.sum(axis=1).var()
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+
+def _crop_box(mask, scale, image_size, padding=0.02):
+    """Bounding box of the inked region in full-image coordinates, or None."""
+    rows = np.flatnonzero(mask.mean(axis=1) > 0.01)
+    cols = np.flatnonzero(mask.mean(axis=0) > 0.01)
+    if len(rows) == 0 or len(cols) == 0:
+        return None
+    width, height = image_size
+    pad_x, pad_y = int(width * padding), int(height * padding)
+    box = (
+        max(0, int(cols[0] * scale) - pad_x),
+        max(0, int(rows[0] * scale) - pad_y),
+        min(width, int((cols[-1] + 1) * scale) + pad_x),
+        min(height, int((rows[-1] + 1) * scale) + pad_y),
+    )
+    # skip crops that would remove almost nothing
+    if (box[2] - box[0]) * (box[3] - box[1]) > 0.95 * width * height:
+        return None
+    return box
+
+
+def preprocess_image(image, max_long_edge=None, grayscale=None, deskew=None, autocrop=None):
+    """Prepare a decoded page for extraction and report how much pixel data it saved.
+
+    Applies EXIF orientation, optional deskew and auto-crop to the cheque
+    region, downscaling to max_long_edge and optional grayscale. Returns
+    (image, stats); the image stays decoded so it is encoded only once, when
+    it is sent to the model.
+    """
+    max_long_edge = max_long_edge or PREPROCESS_MAX_LONG_EDGE
+    grayscale = PREPROCESS_GRAYSCALE if grayscale is None else grayscale
+    deskew = PREPROCESS_DESKEW if deskew is None else deskew
+    autocrop = PREPROCESS_AUTOCROP if autocrop is None else autocrop
+
+    original_size = image.size
+    decoded_bytes = _pixel_bytes(image)
+    image = ImageOps.exif_transpose(image).convert("RGB")
+
+    # shrink very large photos before the costlier steps, keeping headroom for a crop
+    factor = max(image.size) // (2 * max_long_edge)
+    if factor >= 2:
+        image = image.reduce(factor)
+
+    if deskew or autocrop:
+        mask, scale = _analysis_mask(image)
+        if deskew:
+            angle = _deskew_angle(mask)
+            if angle:
+                image = image.rotate(angle, resample=Image.BILINEAR, expand=True, fillcolor="white")
+                mask, scale = _analysis_mask(image)
+        if autocrop:
+            box = _crop_box(mask, scale, image.size)
+            if box:
+                image = image.crop(box)
+
+    if max(image.size) > max_long_edge:
+        image.thumbnail((max_long_edge, max_long_edge), Image.LANCZOS)
+
+    if grayscale:
+        image = image.convert("L")
+
+    stats = {
+        "original_size": original_size,
+        "final_size": image.size,
+        "decoded_bytes": decoded_bytes,
+        "preprocessed_bytes": _pixel_bytes(image),
+    }
+    stats["bytes_saved"] = stats["decoded_bytes"] - stats["preprocessed_bytes"]
+    logging.info(f"Preprocessed page {original_size} -> {image.size}, {stats['bytes_saved']} bytes of pixel data saved.")
+    return image, stats
+
+
+def encode_for_model(image, quality=None):
+    """Encode a decoded page once, as the JPEG blob sent to Gemini."""
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=quality or PREPROCESS_JPEG_QUALITY)
+    return {"mime_type": "image/jpeg", "data": output.getvalue()}
@@ -0,0 +1,91 @@
+import functools
+import logging
+import os
+import shutil
+import tempfile
+
+# PDF rasterization settings
+PDF_DPI = int(os.getenv("PDF_DPI", "200"))
+PDF_RASTER_THREADS = int(os.getenv("PDF_RASTER_THREADS", "1"))
+PDF_PAGES_PER_BATCH = int(os.getenv("PDF_PAGES_PER_BATCH", "4"))
+POPPLER_PATH = os.getenv("POPPLER_PATH")
+
+
+@functools.lru_cache(maxsize=None)
+def find_poppler_path():
+    """Locate the poppler binaries once per process."""
+    if POPPLER_PATH:
+        return POPPLER_PATH
+    if os.name == "nt":  # windows system
+        return r"C:\poppler-24.08.0\Library\bin"
+    pdftoppm = shutil.which("pdftoppm")
+    if pdftoppm:
+        logging.info(f"Poppler is installed at: {pdftoppm}")
+        return os.path.dirname(pdftoppm)
+    logging.warning("Poppler is NOT found in PATH.")
+    return "/usr/bin"
+
+
+class PdfRasterizer:
+    """Render a PDF lazily, a few pages at a time.
+
+    The PDF is written to a temporary file once; pages are then rendered in
+    ranges of batch_size with pdftoppm and yielded one by one, so only the
+    current batch is held in memory however long the document is. A
+    rasterizer can be iterated once; the temporary file is removed afterwards.
+    Iteration starts at first_page (1-based), so an interrupted document can
+    be resumed.
+    """
+
+    def __init__(self, pdf_bytes, dpi=None, thread_count=None, batch_size=None, grayscale=False, poppler_path=None, first_page=1):
+        self.dpi = dpi or PDF_DPI
+        self.thread_count = max(1, thread_count or PDF_RASTER_THREADS)
+        self.batch_size = max(1, batch_size or PDF_PAGES_PER_BATCH)
+        self.grayscale = grayscale
+        self.poppler_path = poppler_path
+        self.first_page = max(1, first_page)
+        self.path = None
+
+        from pdf2image import pdfinfo_from_path
+
+        handle, self.path = tempfile.mkstemp(suffix=".pdf")
+        with os.fdopen(handle, "wb") as f:
+            f.write(pdf_bytes)
+        try:
+            self.page_count = pdfinfo_from_path(self.path, poppler_path=poppler_path)["Pages"]
+        except Exception:
+            self.close()
+            raise
+
+    def __len__(self):
+        return self.page_count
+
+    def __iter__(self):
+        from pdf2image import convert_from_path
+
+        try:
+            for first_page in range(self.first_page, self.page_count + 1, self.batch_size):
+                last_page = min(first_page + self.batch_size - 1, self.page_count)
+                images = convert_from_path(
+                    self.path,
+                    dpi=self.dpi,
+                    first_page=first_page,
+                    last_page=last_page,
+                    thread_count=min(self.thread_count, last_page - first_page + 1),
+                    grayscale=self.grayscale,
+                    poppler_path=self.poppler_path,
+                )
+                logging.info(f"Rendered PDF pages {first_page}-{last_page} of {self.page_count}.")
+                while images:
+                    # hand each page over without keeping a reference here
+                    yield images.pop(0)
+        finally:
+            self.close()
+
+    def close(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+        self.path = None
+
+    def __del__(self):
+        self.close()
@@ -0,0 +1,170 @@
+import logging
+import random
+import threading
+import time
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a dependency while its circuit breaker is open."""
+
+    def __init__(self, message, retry_after=0.0):
+        super().__init__(message)
+        # seconds until the breaker lets a trial call through
+        self.retry_after = retry_after
+
+
+class DeadlineExceededError(TimeoutError):
+    """Raised when a call and its retries run past their deadline."""
+
+    def __init__(self, message, retry_after=0.0):
+        super().__init__(message)
+        # seconds until the rate limiter would have let the call through
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Thread-safe token bucket: rate tokens per second, bursting up to capacity."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline=None):
+        """Take one token, sleeping until one is available. Returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise DeadlineExceededError("Deadline exceeded while waiting for the rate limiter.", retry_after=wait)
+            time.sleep(wait)
+            waited += wait
+
+
+class CircuitBreaker:
+    """Fail fast after failure_threshold consecutive failures.
+
+    While open, calls are rejected for reset_timeout seconds; after that a
+    single trial call is let through (half-open) and its outcome closes or
+    re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == "open":
+                elapsed = time.monotonic() - self._opened_at
+                if elapsed < self.reset_timeout:
+                    raise CircuitOpenError("Circuit breaker is open; failing fast.", retry_after=self.reset_timeout - elapsed)
+                self.state = "half-open"
+                return
+            if self.state == "half-open":
+                # a trial call is already in flight
+                raise CircuitOpenError("Circuit breaker is half-open; waiting for the trial call.", retry_after=self.reset_timeout)
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == "half-open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    logging.warning(f"Circuit breaker opened after {self._failures} consecutive failures.")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+
+class ResilientCaller:
+    """Wrap calls to a remote API with rate limiting, retries, a deadline and a circuit breaker.
+
+    Retryable exceptions are retried with exponential backoff and full jitter
+    until max_attempts or the per-call deadline is reached. Counters in
+    stats() are shared by every thread using the caller.
+    """
+
+    def __init__(self, limiter, breaker, retryable, max_attempts=4, base_delay=1.0, max_delay=30.0, deadline=60.0):
+        self.limiter = limiter
+        self.breaker = breaker
+        self.retryable = retryable
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self._counters = {
+            "calls": 0, "successes": 0, "failures": 0, "retries": 0,
+            "throttled_seconds": 0.0, "backoff_seconds": 0.0, "circuit_rejections": 0, "deadline_exceeded": 0,
+        }
+        self._lock = threading.Lock()
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def call(self, func, *args, **kwargs):
+        """Call func(*args, timeout=<seconds left>, **kwargs) under the resilience policy."""
+        self._count("calls")
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                self._count("throttled_seconds", self.limiter.acquire(deadline))
+                self.breaker.before_call()
+            except DeadlineExceededError:
+                self._count("deadline_exceeded")
+                self._count("failures")
+                raise
+            except CircuitOpenError:
+                self._count("circuit_rejections")
+                self._count("failures")
+                raise
+
+            try:
+                result = func(*args, timeout=max(deadline - time.monotonic(), 0.1), **kwargs)
+            except self.retryable as err:
+                self.breaker.record_failure()
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+                if attempt >= self.max_attempts or time.monotonic() + delay > deadline:
+                    self._count("failures")
+                    if time.monotonic() + delay > deadline:
+                        self._count("deadline_exceeded")
+                    raise
+                logging.warning(f"Retryable error on attempt {attempt}: {err}; retrying in {delay:.1f}s.")
+                self._count("retries")
+                self._count("backoff_seconds", delay)
+                time.sleep(delay)
+                continue
+            except Exception:
+                # not retryable: the request itself is bad, the service is up
+                self.breaker.record_success()
+                self._count("failures")
+                raise
+
+            self.breaker.record_success()
+            self._count("successes")
+            return result
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        counters["circuit_state"] = self.breaker.state
+        return counters
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+# cheque_details_tbl columns, in display order
+RECORD_COLUMNS = ["cheque_date", "account_number", "bank_name", "cheque_number", "payee_name", "amount", "uploaded_at", "status"]
+CATEGORY_COLUMNS = ["bank_name", "status"]
+# identifiers keep their leading zeros, so they stay strings
+TEXT_COLUMNS = ["account_number", "cheque_number", "payee_name"]
+
+
+def parse_amounts(values):
+    """Parse stored amount strings to floats the same way cheque_amount_value() does."""
+    digits = values.astype("string").str.replace(r"[^0-9.]", "", regex=True)
+    return pd.to_numeric(digits.replace("", pd.NA), errors="coerce").astype("float64")
+
+
+def to_typed_frame(raw):
+    """Convert raw cheque_details_tbl rows (list of dicts or DataFrame of strings) to the typed frame.
+
+    amount becomes float64 (NaN when unreadable), cheque_date and uploaded_at
+    become datetimes (uploaded_at in UTC), bank_name and status become
+    categoricals, and upload_day / upload_month are derived from uploaded_at.
+    """
+    frame = raw if isinstance(raw, pd.DataFrame) else pd.DataFrame(raw)
+    frame = frame.reindex(columns=["id"] + RECORD_COLUMNS)
+
+    typed = pd.DataFrame(index=frame.index)
+    typed["id"] = pd.to_numeric(frame["id"], errors="coerce").astype("Int64")
+    typed["cheque_date"] = pd.to_datetime(frame["cheque_date"], format="%Y-%m-%d", errors="coerce")
+    for col in TEXT_COLUMNS:
+        typed[col] = frame[col].fillna("").astype(str)
+    for col in CATEGORY_COLUMNS:
+        typed[col] = frame[col].astype("category")
+    typed["amount"] = parse_amounts(frame["amount"])
+    typed["uploaded_at"] = pd.to_datetime(frame["uploaded_at"], format="ISO8601", utc=True, errors="coerce")
+    # calendar day and month of the upload in UTC, as the SQL aggregates count them
+    typed["upload_day"] = typed["uploaded_at"].dt.tz_convert(None).dt.normalize()
+    typed["upload_month"] = typed["upload_day"].dt.to_period("M")
+    return typed[["id"] + RECORD_COLUMNS + ["upload_day", "upload_month"]]
+
+
+def empty_typed_frame():
+    return to_typed_frame(pd.DataFrame(columns=["id"] + RECORD_COLUMNS))
+
+
+def concat_typed(frames):
+    """Concatenate typed frames, keeping categoricals categorical across differing categories."""
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return empty_typed_frame()
+    if len(frames) == 1:
+        return frames[0]
+    frames = [frame.copy(deep=False) for frame in frames]
+    for col in CATEGORY_COLUMNS:
+        categories = pd.Index([])
+        for frame in frames:
+            categories = categories.union(frame[col].cat.categories, sort=False)
+        for frame in frames:
+            frame[col] = frame[col].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+
+def format_amounts(amounts):
+    """Render amounts as plain numbers without trailing zeros (20000, 1250.5)."""
+    text = pd.Series("", index=amounts.index, dtype=object)
+    whole = amounts.notna() & (amounts == amounts.round())
+    text[whole] = amounts[whole].astype("int64").astype(str)
+    fractional = amounts.notna() & ~whole
+    text[fractional] = amounts[fractional].map(lambda value: f"{value:.2f}".rstrip("0").rstrip("."))
+    return text.astype(str)
+
+
+def format_datetimes(values, unit):
+    """Render datetimes as ISO strings at unit precision ("D" or "s"), with blanks for NaT."""
+    if getattr(values.dt, "tz", None) is not None:
+        values = values.dt.tz_convert(None)
+    text = np.datetime_as_string(values.to_numpy().astype(f"datetime64[{unit}]"), unit=unit)
+    text = pd.Series(text, index=values.index).str.replace("T", " ", regex=False)
+    return text.where(values.notna(), "")
+
+
+def to_display_frame(typed, columns=None):
+    """Typed records as display strings, in RECORD_COLUMNS order (or the given columns)."""
+    display = pd.DataFrame(index=typed.index)
+    for col in columns or RECORD_COLUMNS:
+        values = typed[col]
+        if col == "cheque_date":
+            display[col] = format_datetimes(values, "D")
+        elif col == "uploaded_at":
+            display[col] = format_datetimes(values, "s")
+        elif col == "amount":
+            display[col] = format_amounts(values)
+        else:
+            # blanks for missing values; astype(str) would print a categorical NaN as "nan"
+            display[col] = values.astype(object).where(values.notna(), "").astype(str)
+    return display
+
+
+def memory_report(raw, typed):
+    """Bytes per column of the raw string frame against the typed frame."""
+    raw = raw if isinstance(raw, pd.DataFrame) else pd.DataFrame(raw)
+    raw_bytes = raw.memory_usage(deep=True, index=False)
+    typed_bytes = typed.memory_usage(deep=True, index=False)
+    columns = {}
+    for col in typed.columns:
+        columns[col] = {"raw": int(raw_bytes.get(col, 0)), "typed": int(typed_bytes[col])}
+    total_raw, total_typed = int(raw_bytes.sum()), int(typed_bytes.sum())
+    return {
+        "rows": len(typed),
+        "raw_bytes": total_raw,
+        "typed_bytes": total_typed,
+        "ratio": total_typed / total_raw if total_raw else None,
+        "columns": columns,
+    }